@@ -1,17 +1,60 @@
+from __future__ import annotations
+
 import logging
+from typing import TYPE_CHECKING
 
-from homeassistant.config_entries import ConfigEntry, ConfigEntryNotReady
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers import entity_registry as er
+import aiohttp
 
 from custom_components.divus_dplus.api import DivusDplusApi
-from custom_components.divus_dplus.const import DOMAIN, PLATFORMS
-from custom_components.divus_dplus.coordinator import DivusCoordinator
+from custom_components.divus_dplus.const import (
+    CONF_BRIDGE_URL,
+    CONF_MAX_CONCURRENCY,
+    CONF_POLL_CHUNK_SIZE,
+    CONF_RECORD_TRAFFIC,
+    CONF_TRACE_SAMPLE_RATE,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_POLL_CHUNK_SIZE,
+    DOMAIN,
+    PLATFORMS,
+)
+from custom_components.divus_dplus.tracing import DivusTracer
+from custom_components.divus_dplus.transport import (
+    AiohttpTransport,
+    BridgeTransport,
+    DivusTransport,
+    RecordingTransport,
+)
+
+try:
+    from homeassistant.config_entries import ConfigEntry, ConfigEntryNotReady
+    from homeassistant.helpers import config_validation as cv
+    from homeassistant.helpers import device_registry as dr
+    from homeassistant.helpers import entity_registry as er
+
+    from custom_components.divus_dplus.coordinator import DivusCoordinator
+    from custom_components.divus_dplus.hub import async_get_hub
+    from custom_components.divus_dplus.services import async_setup_services
+except ModuleNotFoundError as err:
+    # The API client can run without Home Assistant through the standalone
+    # CLI (python -m custom_components.divus_dplus), which imports this
+    # package first.
+    if err.name != "homeassistant":
+        raise
+else:
+    CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+if TYPE_CHECKING:
+    from homeassistant.core import HomeAssistant
+    from homeassistant.helpers.typing import ConfigType
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: ARG001
+    async_setup_services(hass)
+    return True
+
+
 async def _async_migrate_entity_areas_to_devices(
     hass: HomeAssistant, entry: ConfigEntry
 ) -> None:
@@ -75,16 +118,57 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     username: str = entry.data.get("username", "")
     password: str = entry.data.get("password", "")
 
-    api = DivusDplusApi(host, username, password)
+    hub = async_get_hub(hass)
+    tracer = DivusTracer()
+    if sample_rate := entry.options.get(CONF_TRACE_SAMPLE_RATE):
+        trace_path = hass.config.path(f"{DOMAIN}_{entry.entry_id}.trace.jsonl")
+        _LOGGER.warning(
+            "Tracing %.0f%% of DIVUS D+ polls to %s", sample_rate * 100, trace_path
+        )
+        tracer = DivusTracer(sample_rate, trace_path)
+        # A traced entry gets a session of its own, so only its requests are timed
+        session = aiohttp.ClientSession(trace_configs=[tracer.trace_config()])
+    else:
+        session = hub.session(entry.entry_id)
+    close_session = bool(sample_rate)
+
+    transport: DivusTransport
+    if bridge_url := entry.data.get(CONF_BRIDGE_URL):
+        _LOGGER.info("Connecting to DIVUS D+ through bridge %s", bridge_url)
+        transport = BridgeTransport(session, bridge_url, close_session=close_session)
+    else:
+        transport = AiohttpTransport(session, close_session=close_session)
+    if entry.options.get(CONF_RECORD_TRAFFIC):
+        capture_path = hass.config.path(f"{DOMAIN}_{entry.entry_id}.capture.jsonl")
+        _LOGGER.warning("Recording DIVUS D+ traffic to %s", capture_path)
+        transport = RecordingTransport(transport, capture_path)
+
+    api = DivusDplusApi(
+        host,
+        username,
+        password,
+        transport,
+        max_concurrency=entry.options.get(
+            CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY
+        ),
+        poll_chunk_size=entry.options.get(
+            CONF_POLL_CHUNK_SIZE, DEFAULT_POLL_CHUNK_SIZE
+        ),
+        tracer=tracer,
+    )
 
     coordinator = DivusCoordinator(hass, api, entry)
     try:
         await coordinator.async_config_entry_first_refresh()
     except Exception as err:
+        await api.close()
+        await hub.async_release_session(entry.entry_id)
         raise ConfigEntryNotReady(f"Could not connect to DIVUS D+ at {host}: {err}") from err
 
     _LOGGER.debug("Set up DIVUS D+ entry for host %s", host)
 
+    entry.async_on_unload(hub.async_add_coordinator(coordinator))
+
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     await _async_migrate_entity_areas_to_devices(hass, entry)
@@ -101,5 +185,7 @@ async def _async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        await data["api"].close()
+        await async_get_hub(hass).async_release_session(entry.entry_id)
     return unload
@@ -0,0 +1,272 @@
+"""
+Standalone benchmarking tool for the DIVUS D+ API client.
+
+Runs without Home Assistant:
+
+    python -m custom_components.divus_dplus --host 192.168.1.2 discover
+    python -m custom_components.divus_dplus poll --count 50 --interval 2
+    python -m custom_components.divus_dplus write-burst --value 0 10790 10788
+    python -m custom_components.divus_dplus dump-topology -o topology.json
+    python -m custom_components.divus_dplus probe
+    python -m custom_components.divus_dplus bridge --listen 0.0.0.0
+    python -m custom_components.divus_dplus --trace poll.trace.jsonl poll
+
+Host and credentials default to the TEST_HOST, TEST_USERNAME and
+TEST_PASSWORD environment variables used by the integration tests.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import aiohttp
+
+from custom_components.divus_dplus.api import DivusDplusApi
+from custom_components.divus_dplus.bridge import DEFAULT_BRIDGE_PORT, DivusBridge
+from custom_components.divus_dplus.const import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_SCAN_INTERVAL,
+)
+from custom_components.divus_dplus.dtos import DeviceDto
+from custom_components.divus_dplus.tracing import DivusTracer
+from custom_components.divus_dplus.transport import (
+    AiohttpTransport,
+    DivusTransport,
+    RecordingTransport,
+    ReplayTransport,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+
+def _out(line: str = "") -> None:
+    sys.stdout.write(line + "\n")
+
+
+class _MeasuringTransport:
+    """Collect per-endpoint latencies of every request passing through."""
+
+    def __init__(self, inner: DivusTransport) -> None:
+        self._inner = inner
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+
+    async def post(self, url: str, data: str, content_type: str) -> str:
+        endpoint = url.rstrip("/").rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        try:
+            return await self._inner.post(url, data, content_type)
+        except Exception:
+            self.errors[endpoint] += 1
+            raise
+        finally:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+
+    async def close(self) -> None:
+        await self._inner.close()
+
+
+def _percentile(values: list[float], percentile: int) -> float:
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percentile - 1]
+
+
+def _report(title: str, measured: _MeasuringTransport, elapsed: float) -> None:
+    total = sum(len(values) for values in measured.latencies.values())
+    rate = f" ({total / elapsed:.1f} req/s)" if elapsed else ""
+    _out(f"\n{title}: {total} requests in {elapsed:.2f} s{rate}")
+    header = "".join(f"{f'p{p}':>9}" for p in PERCENTILES)
+    _out(f"{'endpoint':<18}{'count':>7}{'errors':>7}{header}{'max':>9}")
+    for endpoint, values in sorted(measured.latencies.items()):
+        row = "".join(f"{_percentile(values, p) * 1000:>7.1f}ms" for p in PERCENTILES)
+        _out(
+            f"{endpoint:<18}{len(values):>7}{measured.errors[endpoint]:>7}"
+            f"{row}{max(values) * 1000:>7.1f}ms"
+        )
+
+
+def _device_ids(devices: list[DeviceDto]) -> list[str]:
+    """Return the IDs of all sub-elements, the objects the integration polls."""
+    return [sub["ID"] for device in devices for sub in device.sub_elements] + [
+        device.id for device in devices if not device.sub_elements
+    ]
+
+
+async def _discover(api: DivusDplusApi, measured: _MeasuringTransport) -> int:
+    started = time.perf_counter()
+    first_room: float | None = None
+    devices: list[DeviceDto] = []
+    rooms = 0
+    async for room in api.iter_rooms():
+        if first_room is None:
+            first_room = time.perf_counter() - started
+        devices.extend(room)
+        rooms += 1
+    _out(f"Discovered {len(devices)} devices in {rooms} rooms")
+    if first_room is not None:
+        _out(f"First room after {first_room:.2f} s")
+    _report("discover", measured, time.perf_counter() - started)
+    return 0
+
+
+async def _poll(
+    api: DivusDplusApi, measured: _MeasuringTransport, args: argparse.Namespace
+) -> int:
+    ids = args.ids or _device_ids(await api.get_devices())
+    measured.latencies.clear()
+    measured.errors.clear()
+    _out(f"Polling {len(ids)} objects {args.count} times")
+
+    started = time.perf_counter()
+    for _ in range(args.count):
+        tick = time.perf_counter()
+        await api.get_states(ids)
+        await asyncio.sleep(max(args.interval - (time.perf_counter() - tick), 0))
+    _report("poll", measured, time.perf_counter() - started)
+    return 0
+
+
+async def _write_burst(
+    api: DivusDplusApi, measured: _MeasuringTransport, args: argparse.Namespace
+) -> int:
+    started = time.perf_counter()
+    results = await api.set_values(
+        dict.fromkeys(args.ids, args.value), max_concurrency=args.concurrency
+    )
+    failed = [result.id for result in results.values() if not result.success]
+    if failed:
+        _out(f"Failed writes: {', '.join(failed)}")
+    _report("write-burst", measured, time.perf_counter() - started)
+    return 1 if failed else 0
+
+
+async def _dump_topology(api: DivusDplusApi, args: argparse.Namespace) -> int:
+    devices = await api.get_devices()
+    topology = [device.to_dict() for device in devices]
+    output = json.dumps(topology, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(output, encoding="utf-8")  # noqa: ASYNC240
+        _out(f"Wrote {len(devices)} devices to {args.output}")
+    else:
+        _out(output)
+    return 0
+
+
+async def _probe(api: DivusDplusApi) -> int:
+    result = await api.probe()
+    _out(f"login          {result.login * 1000:>8.1f}ms")
+    _out(f"surroundings   {result.surroundings * 1000:>8.1f}ms")
+    _out(f"state (1)      {result.single_state * 1000:>8.1f}ms")
+    _out(f"state ({result.sample_size:<2})     {result.multi_state * 1000:>8.1f}ms")
+    for option, value in result.suggested_options().items():
+        _out(f"{option:<15}{value:>8}")
+    return 0
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.divus_dplus",
+        description="Benchmark the DIVUS D+ API client without Home Assistant.",
+    )
+    parser.add_argument("--host", default=os.environ.get("TEST_HOST", ""))
+    parser.add_argument("--username", default=os.environ.get("TEST_USERNAME", ""))
+    parser.add_argument("--password", default=os.environ.get("TEST_PASSWORD", ""))
+    parser.add_argument("--record", help="append redacted traffic to this capture")
+    parser.add_argument("--replay", help="answer requests from this capture")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="replay speed factor, 0 = no delay"
+    )
+    parser.add_argument("--trace", help="write per-request timing spans to this file")
+    parser.add_argument(
+        "--trace-rate", type=float, default=1.0, help="share of operations to trace"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("discover", help="walk the surroundings tree once")
+
+    poll = commands.add_parser("poll", help="poll object states repeatedly")
+    poll.add_argument("--count", type=int, default=10)
+    poll.add_argument("--interval", type=float, default=2.0)
+    poll.add_argument("ids", nargs="*", help="object IDs (default: discover)")
+
+    burst = commands.add_parser("write-burst", help="write one value to many IDs")
+    burst.add_argument("--value", required=True)
+    burst.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    burst.add_argument("ids", nargs="+", help="object IDs to write")
+
+    dump = commands.add_parser("dump-topology", help="write the topology as JSON")
+    dump.add_argument("-o", "--output", help="file to write (default: stdout)")
+
+    commands.add_parser("probe", help="time typical requests and suggest options")
+
+    bridge = commands.add_parser(
+        "bridge", help="share one controller session between HA instances"
+    )
+    bridge.add_argument("--listen", default="127.0.0.1", help="address to bind")
+    bridge.add_argument("--port", type=int, default=DEFAULT_BRIDGE_PORT)
+    bridge.add_argument("--interval", type=float, default=DEFAULT_SCAN_INTERVAL)
+
+    return parser.parse_args(argv)
+
+
+async def _run(args: argparse.Namespace) -> int:  # noqa: PLR0911
+    tracer = DivusTracer(args.trace_rate if args.trace else 0.0, args.trace)
+    inner: DivusTransport = (
+        ReplayTransport(args.replay, args.speed)
+        if args.replay
+        else AiohttpTransport(
+            aiohttp.ClientSession(trace_configs=[tracer.trace_config()])
+        )
+    )
+    if args.record:
+        inner = RecordingTransport(inner, args.record)
+    measured = _MeasuringTransport(inner)
+    # The bridge runs indefinitely, so it must not collect latencies
+    transport = inner if args.command == "bridge" else measured
+    api = DivusDplusApi(
+        args.host, args.username, args.password, transport, tracer=tracer
+    )
+
+    try:
+        match args.command:
+            case "discover":
+                return await _discover(api, measured)
+            case "poll":
+                return await _poll(api, measured, args)
+            case "write-burst":
+                return await _write_burst(api, measured, args)
+            case "dump-topology":
+                return await _dump_topology(api, args)
+            case "probe":
+                return await _probe(api)
+            case "bridge":
+                bridge = DivusBridge(api, args.username, args.password, args.interval)
+                await bridge.serve(args.listen, args.port)
+                return 0
+    finally:
+        await api.close()
+    return 2
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    if not args.host and not args.replay:
+        _LOGGER.error("No host given, use --host or set TEST_HOST")
+        return 2
+    return asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,112 @@
+import asyncio
 import logging
+import statistics
+import time
+from collections.abc import AsyncIterator, Mapping
+from http import HTTPStatus
 from urllib.parse import urlencode
 
 import aiohttp
 from defusedxml import ElementTree
 
-from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
+try:
+    # Home Assistant ships orjson and uses it as its JSON backend
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+from custom_components.divus_dplus.const import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_POLL_CHUNK_SIZE,
+)
+from custom_components.divus_dplus.dtos import (
+    DeviceDto,
+    DeviceStateDto,
+    ProbeResultDto,
+    WriteResultDto,
+)
+from custom_components.divus_dplus.governor import DivusLoadGovernor
+from custom_components.divus_dplus.scheduler import (
+    DivusRequestScheduler,
+    RequestPriority,
+)
+from custom_components.divus_dplus.tracing import DivusTracer
+from custom_components.divus_dplus.transport import (
+    AiohttpTransport,
+    DivusTransport,
+    get_session_id,
+    replace_session_id,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
+DISCOVERY_PAGE_SIZE = 50
+PROBE_SAMPLE_SIZE = 20
+
+STATE_COLUMNS = "ID, CURRENT_VALUE"
+# Error flag of an object, selected along with its value where supported.
+# Only these values (in any case) mark the object unavailable; the meaning of
+# others is unknown, so they never take an object down.
+STATUS_COLUMN = "STATUS"
+_STATUS_ERRORS = ("ERROR", "FAULT", "OFFLINE")
+
+# Priority of requests forwarded for other clients, by endpoint
+_FORWARD_PRIORITIES = {
+    "dpadws": RequestPriority.WRITE,
+    "surrounding.php": RequestPriority.DISCOVERY,
+}
+
+# Columns of surrounding rows used by discovery and entity construction
+SURROUNDING_COLUMNS = (
+    "ID",
+    "NAME",
+    "TYPE",
+    "OPTIONALP",
+    "OWNED_BY",
+    "RENDERING_ID",
+    "CURRENT_VALUE",
+)
+
+
+def _rows(surroundings: dict) -> list[dict]:
+    """Return the object rows of a surrounding.php response."""
+    data = surroundings["getObjsFromId"]["data"]
+    # PHP encodes an empty result as a list instead of an object
+    return list(data.values()) if isinstance(data, dict) else list(data)
+
+
+class DivusAuthError(Exception):
+    """Raised when the controller rejects the credentials."""
+
+
+class DivusQueryRefusedError(Exception):
+    """Raised when the controller answers a state query without any states."""
+
 
 class DivusDplusApi:
-    def __init__(self, host: str, username: str, password: str) -> None:
+    def __init__(  # noqa: PLR0913
+        self,
+        host: str,
+        username: str,
+        password: str,
+        transport: DivusTransport | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        poll_chunk_size: int = DEFAULT_POLL_CHUNK_SIZE,
+        tracer: DivusTracer | None = None,
+    ) -> None:
         self._base = f"http://{host}/"
         self._username = username
         self._password = password
-        self._session = aiohttp.ClientSession()
+        self._transport = transport or AiohttpTransport(aiohttp.ClientSession())
         self._session_id = None
+        self._login_lock = asyncio.Lock()
+        self._governor = DivusLoadGovernor(max_limit=max_concurrency)
+        self._scheduler = DivusRequestScheduler(max_in_flight=self._governor.limit)
+        self._max_concurrency = max_concurrency
+        self._poll_chunk_size = poll_chunk_size
+        self._query_status = True
+        self._filter_surroundings = True
+        self.tracer = tracer or DivusTracer()
 
         # Constants for D+ systems
         self._top_surrounding_id = "187"
@@ -23,37 +114,86 @@ class DivusDplusApi:
         self._system_owner = "SYSTEM"
         self._minDevice_state_parts = 2
 
+    async def close(self) -> None:
+        """Close the underlying connection."""
+        await self._transport.close()
+        self.tracer.close()
+
+    async def login(self) -> None:
+        """Log in right away, e.g. to check the credentials."""
+        async with self._login_lock:
+            await self._login()
+
+    async def probe(self, rounds: int = 3) -> ProbeResultDto:
+        """Time a login, a surroundings query and state queries of 1 and n objects."""
+        started = time.perf_counter()
+        await self.login()
+        login = time.perf_counter() - started
+
+        surroundings: list[float] = []
+        single_state: list[float] = []
+        multi_state: list[float] = []
+        sample_ids = [self._top_surrounding_id]
+        for _ in range(rounds):
+            started = time.perf_counter()
+            rows = await self._get_surroundings(
+                self._top_surrounding_id, user_objects_only=False
+            )
+            surroundings.append(time.perf_counter() - started)
+            sample_ids = [row["ID"] for row in rows][:PROBE_SAMPLE_SIZE] or sample_ids
+
+            started = time.perf_counter()
+            await self._get_states_chunk(sample_ids[:1], RequestPriority.REFRESH)
+            single_state.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            await self._get_states_chunk(sample_ids, RequestPriority.REFRESH)
+            multi_state.append(time.perf_counter() - started)
+
+        return ProbeResultDto(
+            login=login,
+            surroundings=statistics.median(surroundings),
+            single_state=statistics.median(single_state),
+            multi_state=statistics.median(multi_state),
+            sample_size=len(sample_ids),
+        )
+
+    @property
+    def governor(self) -> DivusLoadGovernor:
+        """Return the governor that sizes the number of parallel requests."""
+        return self._governor
+
     async def get_devices(self) -> list[DeviceDto]:
-        top_json = await self._get_surroundings(self._top_surrounding_id)
+        devices = [device async for room in self.iter_rooms() for device in room]
+        _LOGGER.info("Retrieved %d devices", len(devices))
+        return devices
+
+    async def iter_rooms(self) -> AsyncIterator[list[DeviceDto]]:
+        """Discover the installation room by room, yielding each room's devices."""
+        # The environments menu itself is a system object, so the top level
+        # is fetched unfiltered.
+        top_rows = await self._get_surroundings(
+            self._top_surrounding_id, user_objects_only=False
+        )
 
         _LOGGER.info("Retrieved top surroundings")
         environment_surrounding_id = next(
-            x["ID"]
-            for x in top_json["getObjsFromId"]["data"].values()
-            if x["NAME"] == self._environment_surrounding_name
+            x["ID"] for x in top_rows if x["NAME"] == self._environment_surrounding_name
         )
-        environment_xml = await self._get_surroundings(environment_surrounding_id)
-        devices = list[DeviceDto]()
-        for room in filter(
-            lambda x: x["OWNED_BY"] != self._system_owner,
-            environment_xml["getObjsFromId"]["data"].values(),
-        ):
+        parent_id = environment_surrounding_id
+        async for room in self._iter_surrounding_rows(parent_id):
+            if not self._is_user_child(room, parent_id):
+                continue
             room_id = room["ID"]
-            devices_json = await self._get_surroundings(room_id)
-            for device_json in filter(
-                lambda x: x["OWNED_BY"] != self._system_owner and x["ID"] != room_id,
-                devices_json["getObjsFromId"]["data"].values(),
-            ):
-                device_sub_elements_json = await self._get_surroundings(
-                    device_json["ID"]
-                )
-                device_sub_elements = list(
-                    filter(
-                        lambda x: x["OWNED_BY"] != self._system_owner
-                        and x["ID"] != device_json["ID"],
-                        device_sub_elements_json["getObjsFromId"]["data"].values(),
-                    )
-                )
+            devices = list[DeviceDto]()
+            async for device_json in self._iter_surrounding_rows(room_id):
+                if not self._is_user_child(device_json, room_id):
+                    continue
+                device_sub_elements = [
+                    sub
+                    for sub in await self._get_surroundings(device_json["ID"])
+                    if self._is_user_child(sub, device_json["ID"])
+                ]
                 device = DeviceDto(
                     device_id=device_json["ID"],
                     parent_id=room_id,
@@ -62,12 +202,61 @@ class DivusDplusApi:
                     sub_elements=device_sub_elements,
                 )
                 devices.append(device)
-        _LOGGER.info("Retrieved %d devices", len(devices))
-        return devices
+            _LOGGER.debug("Retrieved %d devices of room %s", len(devices), room_id)
+            yield devices
 
-    async def get_states(self, device_id: list[str]) -> list[DeviceStateDto]:
+    async def get_states(
+        self,
+        device_id: list[str],
+        priority: RequestPriority = RequestPriority.POLL,
+    ) -> list[DeviceStateDto]:
+        size = self._poll_chunk_size
+        if len(device_id) <= size:
+            return await self._get_states_chunk(device_id, priority)
+
+        # Large installations are queried in chunks that run concurrently
+        results = await asyncio.gather(
+            *(
+                self._get_states_chunk(device_id[i : i + size], priority)
+                for i in range(0, len(device_id), size)
+            )
+        )
+        return [state for states in results for state in states]
+
+    async def _get_states_chunk(
+        self, device_id: list[str], priority: RequestPriority
+    ) -> list[DeviceStateDto]:
+        with self.tracer.span("get_states", objects=len(device_id)) as span:
+            query_status = self._query_status
+            states = await self._query_states(
+                device_id, priority, query_status=query_status
+            )
+            if states is None and query_status:
+                # Firmware without the status column rejects the whole query
+                states = await self._query_states(
+                    device_id, priority, query_status=False
+                )
+                if states is not None:
+                    _LOGGER.info(
+                        "Controller has no %s column, polling values only",
+                        STATUS_COLUMN,
+                    )
+                    self._query_status = False
+            span.event("parsed")
+            return states or []
+
+    async def _query_states(
+        self,
+        device_id: list[str],
+        priority: RequestPriority,
+        *,
+        query_status: bool,
+    ) -> list[DeviceStateDto] | None:
+        """Return the states of the objects, or None if the query was rejected."""
         form_data = {
-            "args": "ID, CURRENT_VALUE",
+            "args": f"{STATE_COLUMNS}, {STATUS_COLUMN}"
+            if query_status
+            else STATE_COLUMNS,
             "src": "DPADD_OBJECT",
             "filter": "ID IN (" + ", ".join(device_id) + ")",
             "type": "SELECT",
@@ -75,38 +264,46 @@ class DivusDplusApi:
             "sessionid": await self._get_session_id(),
         }
 
-        async with self._session.post(
-            self._base + "www/modules/system/api.php",
-            data=urlencode(form_data),
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        ) as r:
-            response = await r.text()
+        response = await self._post(
+            "www/modules/system/api.php",
+            urlencode(form_data),
+            "application/x-www-form-urlencoded",
+            priority,
+        )
 
+        try:
             xml = ElementTree.fromstring(response)
-            payload = xml.find(".//payload")
-            data = payload.text if payload is not None else None
-            if data:
-                rows = data.splitlines()
-                rows = list(
-                    filter(lambda x: x.strip() != "" and x.startswith("Row"), rows)
-                )[1:]
-                states = []
-                for full_row in rows:
-                    row = full_row.strip()
-                    row = row[row.index(":") + 1 :].strip()
-                    parts = row.split(",")
-                    if len(parts) >= self._minDevice_state_parts:
-                        states.append(
-                            DeviceStateDto(
-                                device_id=parts[0].strip("'"),
-                                current_value=parts[1].strip("'"),
-                            )
+        except ElementTree.ParseError:
+            return None
+        payload = xml.find(".//payload")
+        if payload is None:
+            return None
+        data = payload.text
+        if data:
+            rows = data.splitlines()
+            rows = list(filter(lambda x: x.strip() != "" and x.startswith("Row"), rows))
+            # Row0 names the columns the controller actually returned
+            header = rows[0][rows[0].index(":") + 1 :].split(",") if rows else []
+            has_status = STATUS_COLUMN in (column.strip() for column in header)
+            states = []
+            for full_row in rows[1:]:
+                row = full_row.strip()
+                row = row[row.index(":") + 1 :].strip()
+                parts = row.split(",")
+                if len(parts) >= self._minDevice_state_parts:
+                    status = parts[-1].strip().strip("'") if has_status else ""
+                    states.append(
+                        DeviceStateDto(
+                            device_id=parts[0].strip("'"),
+                            current_value=parts[1].strip("'"),
+                            available=status.upper() not in _STATUS_ERRORS,
                         )
+                    )
 
-                _LOGGER.info("Retrieved %d device states", len(states))
-                return states
+            _LOGGER.info("Retrieved %d device states", len(states))
+            return states
 
-            return []
+        return []
 
     async def set_value(self, device_id: str, value: str) -> str:
         xml_value = f"""<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
@@ -124,35 +321,183 @@ class DivusDplusApi:
   </soapenv:Body>
 </soapenv:Envelope>"""
 
-        async with self._session.post(
-            self._base + "/cgi-bin/dpadws",
-            data=xml_value,
-            headers={"Content-Type": "text/xml"},
-        ) as r:
-            _LOGGER.info("Set value for device %s to %s", device_id, value)
-            return await r.text()
+        response = await self._post(
+            "/cgi-bin/dpadws", xml_value, "text/xml", RequestPriority.WRITE
+        )
+        _LOGGER.info("Set value for device %s to %s", device_id, value)
+        return response
+
+    async def set_values(
+        self,
+        values: Mapping[str, str],
+        max_concurrency: int | None = None,
+    ) -> dict[str, WriteResultDto]:
+        """Write many object values concurrently and report the result per ID."""
+        semaphore = asyncio.Semaphore(max_concurrency or self._max_concurrency)
+
+        async def _write(device_id: str, value: str) -> WriteResultDto:
+            async with semaphore:
+                try:
+                    response = await self.set_value(device_id, value)
+                except (TimeoutError, aiohttp.ClientError) as err:
+                    _LOGGER.warning(
+                        "Failed to set value for device %s: %s", device_id, err
+                    )
+                    return WriteResultDto(
+                        device_id, error=str(err) or type(err).__name__
+                    )
+                return WriteResultDto(device_id, response=response)
+
+        results = await asyncio.gather(
+            *(_write(device_id, value) for device_id, value in values.items())
+        )
+        return {result.id: result for result in results}
+
+    async def forward(self, path: str, data: str, content_type: str) -> str:
+        """Send a request built by another client under this client's session."""
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        data = replace_session_id(data, content_type, await self._get_session_id())
+        return await self._post(
+            path.lstrip("/"),
+            data,
+            content_type,
+            _FORWARD_PRIORITIES.get(endpoint, RequestPriority.REFRESH),
+        )
+
+    async def _iter_surrounding_rows(self, surrounding_id: str) -> AsyncIterator[dict]:
+        """Yield the rows of a surrounding, fetched page by page via ``limit``."""
+        offset = 0
+        seen: set[str] = set()
+        while True:
+            rows = await self._get_surroundings(
+                surrounding_id, limit=f"{offset},{DISCOVERY_PAGE_SIZE}"
+            )
+            new_rows = [row for row in rows if row["ID"] not in seen]
+            for row in new_rows:
+                seen.add(row["ID"])
+                yield row
+            # A short page is the last one. Stop as well when the box ignored
+            # the limit, which shows as a long page or one with nothing new.
+            if len(rows) != DISCOVERY_PAGE_SIZE or not new_rows:
+                return
+            offset += DISCOVERY_PAGE_SIZE
+
+    def _is_user_child(self, row: dict, parent_id: str) -> bool:
+        """
+        Return True for non-system children of a surrounding.
+
+        The request filter already excludes everything else; this only
+        guards against firmware that ignores or rejects the filter.
+        """
+        return row.get("OWNED_BY") != self._system_owner and row["ID"] != parent_id
+
+    async def _get_surroundings(
+        self,
+        surrounding_id: str,
+        limit: str = "",
+        *,
+        user_objects_only: bool = True,
+    ) -> list[dict]:
+        """Return the rows of a surrounding, reduced to the columns we use."""
+        filter_rows = user_objects_only and self._filter_surroundings
+        try:
+            return await self._query_surroundings(
+                surrounding_id, limit, filter_rows=filter_rows
+            )
+        except (KeyError, TypeError, ValueError):
+            if not filter_rows:
+                raise
+        # Firmware that rejects the filter answers with an error body instead
+        # of rows; _is_user_child then does the filtering on our side.
+        rows = await self._query_surroundings(surrounding_id, limit, filter_rows=False)
+        _LOGGER.info("Controller rejects the surrounding filter, filtering locally")
+        self._filter_surroundings = False
+        return rows
 
-    async def _get_surroundings(self, surrounding_id: str) -> dict:
+    async def _query_surroundings(
+        self, surrounding_id: str, limit: str, *, filter_rows: bool
+    ) -> list[dict]:
         form_data = {
             "ids": surrounding_id,
-            "filter": "",
+            "filter": (
+                f"OWNED_BY <> '{self._system_owner}' AND ID <> '{surrounding_id}'"
+                if filter_rows
+                else ""
+            ),
             "order": "ORDER_NUM,ID",
-            "limit": "",
+            "limit": limit,
             "context": "runtime",
             "sessionId": await self._get_session_id(),
         }
 
-        async with self._session.post(
-            self._base + "www/modules/system/surrounding.php",
-            data=urlencode(form_data),
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        ) as r:
-            return await r.json()
+        with self.tracer.span("surroundings", id=surrounding_id) as span:
+            response = await self._post(
+                "www/modules/system/surrounding.php",
+                urlencode(form_data),
+                "application/x-www-form-urlencoded",
+                RequestPriority.DISCOVERY,
+            )
+            rows = [
+                {column: row[column] for column in SURROUNDING_COLUMNS if column in row}
+                for row in _rows(json_loads(response))
+            ]
+            span.event("parsed")
+            return rows
+
+    async def _post(
+        self, path: str, data: str, content_type: str, priority: RequestPriority
+    ) -> str:
+        """Send a request, logging in again once if the session was rejected."""
+        try:
+            return await self._post_once(path, data, content_type, priority)
+        except aiohttp.ClientResponseError as err:
+            session_id = get_session_id(data, content_type)
+            if err.status != HTTPStatus.UNAUTHORIZED or session_id is None:
+                raise
+        # The session expired, or the bridge restarted and issues new ones
+        _LOGGER.info("Session rejected, logging in again")
+        if self._session_id == session_id:
+            self._session_id = None
+        data = replace_session_id(data, content_type, await self._get_session_id())
+        return await self._post_once(path, data, content_type, priority)
+
+    async def _post_once(
+        self, path: str, data: str, content_type: str, priority: RequestPriority
+    ) -> str:
+        """Send a request through the scheduler and return the response body."""
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+        with self.tracer.span(
+            "request", endpoint=endpoint, priority=priority.name.lower()
+        ) as span:
+            async with self._scheduler.slot(priority):
+                span.event("slot")
+                started = time.monotonic()
+                try:
+                    response = await self._transport.post(
+                        self._base + path, data, content_type
+                    )
+                except (TimeoutError, aiohttp.ClientError):
+                    self._governor.record_failure()
+                    raise
+                else:
+                    self._governor.record_latency(time.monotonic() - started)
+                    span.event("body")
+                finally:
+                    # Takes effect as the slot is released: a lower limit holds
+                    # back queued requests, a higher one lets more of them start.
+                    self._scheduler.max_in_flight = self._governor.limit
+                return response
 
     async def _get_session_id(self) -> str:
         if self._session_id:
             return self._session_id
 
+        async with self._login_lock:
+            if self._session_id:
+                return self._session_id
+            return await self._login()
+
+    async def _login(self) -> str:
         form_data = {
             "username": self._username,
             "password": self._password,
@@ -160,18 +505,18 @@ class DivusDplusApi:
             "op": "login",
         }
 
-        async with self._session.post(
-            self._base + "www/modules/system/user_login.php",
-            data=form_data,
-            headers={"Content-Type": "application/x-www-form-urlencoded"},
-        ) as resp:
-            text = await resp.text()
-            xml = ElementTree.fromstring(text)
-            session_id_node = xml.find("./sessionid")
-            if session_id_node is not None and session_id_node.text:
-                self._session_id = session_id_node.text
-                _LOGGER.debug("Login successful")
-                return self._session_id
-            _LOGGER.error("Login failed")
-            msg = "Login failed"
-            raise Exception(msg)  # noqa: TRY002
+        with self.tracer.span("login"):
+            text = await self._transport.post(
+                self._base + "www/modules/system/user_login.php",
+                urlencode(form_data),
+                "application/x-www-form-urlencoded",
+            )
+        xml = ElementTree.fromstring(text)
+        session_id_node = xml.find("./sessionid")
+        if session_id_node is not None and session_id_node.text:
+            self._session_id = session_id_node.text
+            _LOGGER.debug("Login successful")
+            return self._session_id
+        _LOGGER.error("Login failed")
+        msg = "Login failed"
+        raise DivusAuthError(msg)
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import secrets
+import time
+from urllib.parse import parse_qsl
+from xml.sax.saxutils import escape
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.divus_dplus.api import (
+    STATE_COLUMNS,
+    STATUS_COLUMN,
+    DivusDplusApi,
+)
+from custom_components.divus_dplus.const import DEFAULT_SCAN_INTERVAL
+from custom_components.divus_dplus.scheduler import (
+    DivusPollSkippedError,
+    RequestPriority,
+)
+from custom_components.divus_dplus.state_store import DivusStateStore
+from custom_components.divus_dplus.transport import get_session_id, redact
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_BRIDGE_PORT = 8765
+
+# Objects nobody asked for within this many seconds are no longer polled
+SUBSCRIPTION_TIMEOUT = 60
+# Surroundings rarely change; every client reuses a discovery response this long
+DISCOVERY_CACHE_TTL = 600
+
+_STATE_QUERY_ARGS = (STATE_COLUMNS, f"{STATE_COLUMNS}, {STATUS_COLUMN}")
+_STATE_QUERY_FILTER = "ID IN ("
+# Reported to clients for objects the controller flagged or left out
+_STATUS_ERROR = "ERROR"
+
+
+class DivusBridge:
+    """
+    Share one controller session and poll loop between several clients.
+
+    Clients talk to the bridge with :class:`BridgeTransport` exactly as they
+    would to the controller. They log in with the bridge's own credentials
+    and get a bridge session ID back. State queries subscribe the requested
+    objects and are answered from the bridge's state store, which a single
+    poll loop keeps current. Surroundings responses are cached and all other
+    requests (such as writes) are forwarded under the bridge's session.
+    """
+
+    def __init__(
+        self,
+        api: DivusDplusApi,
+        username: str,
+        password: str,
+        interval: float = DEFAULT_SCAN_INTERVAL,
+    ) -> None:
+        self._api = api
+        self._credentials = (username, password)
+        self._interval = interval
+        self._token = secrets.token_hex(16)
+
+        self._states = DivusStateStore()
+        self._subscriptions: dict[str, float] = {}
+        self._last_poll: float | None = None
+        self._discovery_cache: dict[str, tuple[float, str]] = {}
+
+    async def serve(self, host: str, port: int = DEFAULT_BRIDGE_PORT) -> None:
+        """Serve clients and poll the controller until cancelled."""
+        app = web.Application()
+        app.router.add_post("/request", self._handle_request)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        _LOGGER.info("DIVUS D+ bridge listening on %s:%d", host, port)
+        try:
+            await self._poll_forever()
+        finally:
+            await runner.cleanup()
+
+    async def _poll_forever(self) -> None:
+        while True:
+            started = time.monotonic()
+            await self._poll()
+            await asyncio.sleep(max(self._interval - (time.monotonic() - started), 0))
+
+    async def _poll(self) -> None:
+        now = time.monotonic()
+        for device_id, requested in list(self._subscriptions.items()):
+            if now - requested > SUBSCRIPTION_TIMEOUT:
+                del self._subscriptions[device_id]
+        if not self._subscriptions:
+            return
+
+        try:
+            states = await self._api.get_states(sorted(self._subscriptions))
+        except DivusPollSkippedError:
+            _LOGGER.debug("Skipping bridge poll, a command is in flight")
+            return
+        except (TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.warning("Bridge poll failed: %s", err)
+            return
+        self._last_poll = time.monotonic()
+        returned = {state.id for state in states}
+        states.extend(
+            self._states.mark_missing(
+                x for x in self._subscriptions if x not in returned
+            )
+        )
+        changes = self._states.update(states)
+        _LOGGER.debug(
+            "Polled %d objects for clients, %d changed", len(states), len(changes)
+        )
+
+    async def _handle_request(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        path: str = body["path"]
+        data: str = body["data"]
+        content_type: str = body["content_type"]
+        endpoint = path.rstrip("/").rsplit("/", 1)[-1]
+
+        if endpoint == "user_login.php":
+            return self._login(data)
+        if get_session_id(data, content_type) != self._token:
+            raise web.HTTPUnauthorized
+
+        try:
+            if endpoint == "api.php" and (query := _state_query(data)):
+                return await self._answer_state_query(*query)
+            if endpoint == "surrounding.php":
+                return await self._answer_surroundings(path, data, content_type)
+            return _xml(await self._api.forward(path, data, content_type))
+        except (TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Forwarding %s failed: %s", endpoint, err)
+            raise web.HTTPBadGateway from err
+
+    def _login(self, data: str) -> web.Response:
+        form = dict(parse_qsl(data, keep_blank_values=True))
+        if (form.get("username", ""), form.get("password", "")) != self._credentials:
+            _LOGGER.warning("Rejected bridge login from %s", form.get("username"))
+            return _xml("<response><error>Login failed</error></response>")
+        return _xml(f"<response><sessionid>{self._token}</sessionid></response>")
+
+    async def _answer_state_query(self, args: str, ids: list[str]) -> web.Response:
+        now = time.monotonic()
+        for device_id in ids:
+            self._subscriptions[device_id] = now
+
+        missing = [
+            device_id for device_id in ids if self._states.get(device_id) is None
+        ]
+        if missing:
+            self._states.update(
+                await self._api.get_states(missing, RequestPriority.REFRESH)
+            )
+            self._last_poll = time.monotonic()
+        elif self._last_poll is None or now - self._last_poll > 3 * self._interval:
+            # Let clients see an outage instead of silently frozen values
+            raise web.HTTPServiceUnavailable
+
+        with_status = args != STATE_COLUMNS
+        rows = [f"Row0: {args}"]
+        for device_id in ids:
+            state = self._states.get(device_id)
+            if state is None or (not state.available and not with_status):
+                continue
+            value = state.current_value if state.current_value is not None else ""
+            row = f"Row{len(rows)}: '{state.id}','{value}'"
+            if with_status:
+                row += f",'{'' if state.available else _STATUS_ERROR}'"
+            rows.append(row)
+        payload = escape("\n".join(rows))
+        return _xml(f"<response><payload>{payload}</payload></response>")
+
+    async def _answer_surroundings(
+        self, path: str, data: str, content_type: str
+    ) -> web.Response:
+        key = redact(data, content_type)
+        cached = self._discovery_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < DISCOVERY_CACHE_TTL:
+            return _json(cached[1])
+        response = await self._api.forward(path, data, content_type)
+        self._discovery_cache[key] = (time.monotonic(), response)
+        return _json(response)
+
+
+def _state_query(data: str) -> tuple[str, list[str]] | None:
+    """Return the columns and object IDs of a state query, None for others."""
+    form = dict(parse_qsl(data, keep_blank_values=True))
+    args = form.get("args", "")
+    query_filter = form.get("filter", "")
+    if args not in _STATE_QUERY_ARGS or not query_filter.startswith(
+        _STATE_QUERY_FILTER
+    ):
+        return None
+    ids = query_filter[len(_STATE_QUERY_FILTER) :].rstrip(")").split(",")
+    ids = [device_id.strip() for device_id in ids if device_id.strip()]
+    return (args, ids) if ids else None
+
+
+def _xml(text: str) -> web.Response:
+    return web.Response(text=text, content_type="text/xml")
+
+
+def _json(text: str) -> web.Response:
+    return web.Response(text=text, content_type="application/json")
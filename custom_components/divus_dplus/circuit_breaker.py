@@ -0,0 +1,76 @@
+import logging
+import time
+from collections.abc import Callable
+from enum import StrEnum
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class DivusCircuitBreaker:
+    """
+    Stop hammering an unresponsive D+ controller.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    rejects requests for a backoff period that doubles with every further
+    failure (capped at ``max_backoff``). Once the backoff has elapsed the
+    breaker goes half-open and lets a single cheap probe through; a
+    successful probe closes it again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._base_backoff = base_backoff
+        self._max_backoff = max_backoff
+        self._clock = clock
+
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+        self._retry_at = 0.0
+
+    @property
+    def backoff(self) -> float:
+        """Return the current backoff in seconds (0 while closed)."""
+        if self.failures < self._failure_threshold:
+            return 0.0
+        exponent = self.failures - self._failure_threshold
+        return min(self._base_backoff * 2**exponent, self._max_backoff)
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent to the controller now."""
+        if self.state != CircuitState.OPEN:
+            return True
+        if self._clock() >= self._retry_at:
+            self.state = CircuitState.HALF_OPEN
+            _LOGGER.debug("Circuit breaker half-open, probing controller")
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != CircuitState.CLOSED:
+            _LOGGER.info("DIVUS D+ controller reachable again, resuming polling")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self._failure_threshold:
+            if self.state == CircuitState.CLOSED:
+                _LOGGER.warning(
+                    "DIVUS D+ controller failed %d times in a row, backing off",
+                    self.failures,
+                )
+            self.state = CircuitState.OPEN
+            self._retry_at = self._clock() + self.backoff
+            _LOGGER.debug("Circuit breaker open for %.1f s", self.backoff)
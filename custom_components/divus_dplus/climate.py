@@ -13,14 +13,12 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     UnitOfTemperature,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.divus_dplus.const import DOMAIN
 from custom_components.divus_dplus.coordinator import DivusCoordinator
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
-from custom_components.divus_dplus.entity import DivusEntity
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -30,16 +28,13 @@ async def async_setup_entry(
 ) -> None:
     _LOGGER.info("Setting up DIVUS D+ climates for entry %s", entry.entry_id)
 
-    devices = hass.data[DOMAIN][entry.entry_id]["coordinator"].devices
-    devices = [dev for dev in devices if isinstance(dev, DivusClimateEntity)]
-    async_add_entities(devices)
+    async_add_divus_entities(hass, entry, async_add_entities, DivusClimateEntity)
 
 
-class DivusClimateEntity(ClimateEntity, CoordinatorEntity, DivusEntity):
+class DivusClimateEntity(DivusEntity, ClimateEntity):
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
 
-        DivusEntity.__init__(self, device)
         self._attr_unique_id = coordinator.entry.entry_id + "_" + device.id
         self._attr_name = device.json["NAME"]
 
@@ -54,6 +49,8 @@ class DivusClimateEntity(ClimateEntity, CoordinatorEntity, DivusEntity):
             if current_temperature_device
             else 0
         )
+        self._temperature_filter = coordinator.temperature_filter()
+        self._temperature_filter.accept(self._attr_current_temperature)
 
         target_temperature_device = next(
             (dev for dev in device.sub_elements if dev["RENDERING_ID"] == "35"), None
@@ -72,7 +69,6 @@ class DivusClimateEntity(ClimateEntity, CoordinatorEntity, DivusEntity):
             self.target_temperature_device_id,
         }
 
-        self.coordinator = coordinator
         _LOGGER.debug("Adding climate device: %s", self._attr_name)
 
     @property
@@ -111,18 +107,36 @@ class DivusClimateEntity(ClimateEntity, CoordinatorEntity, DivusEntity):
         """Set new target temperature."""
         temperature = kwargs.get("temperature")
         if temperature is not None:
-            await self.coordinator.api.set_value(
-                self.target_temperature_device_id, str(int(temperature))
+            await self._async_set_values(
+                {self.target_temperature_device_id: str(int(temperature))}
             )
             _LOGGER.debug(
                 "Set target temperature of %s to %s", self._attr_name, temperature
             )
 
+    def restore_state(self, last_state: State) -> None:
+        current = last_state.attributes.get("current_temperature")
+        if current is not None:
+            self._attr_current_temperature = float(current)
+            self._temperature_filter.reset()
+        target = last_state.attributes.get("temperature")
+        if target is not None:
+            self._attr_target_temperature = float(target)
+
+    def _changed_states(self) -> list[DeviceStateDto]:
+        return self._reoffer_held_back(
+            super()._changed_states(),
+            self.current_temperature_device_id,
+            self._attr_current_temperature,
+            self._temperature_filter,
+        )
+
     def update_state(self, state: DeviceStateDto) -> None:
-        float_current_value = float(state.current_value)
+        float_current_value = float(state.value)
         if (
             state.id == self.current_temperature_device_id
             and float_current_value != self._attr_current_temperature
+            and self._temperature_filter.accept(float_current_value)
         ):
             self._attr_current_temperature = float_current_value
             _LOGGER.debug(
@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from collections.abc import Mapping
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from custom_components.divus_dplus.api import DivusDplusApi
+from custom_components.divus_dplus.const import DOMAIN
+from custom_components.divus_dplus.dtos import WriteResultDto
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_STORAGE_VERSION = 1
+
+# Pause between replayed commands so a reconnect does not cause a write storm
+DRAIN_INTERVAL = 0.5
+
+
+class DivusCommandQueue:
+    """
+    Hold writes the controller did not accept until it is reachable again.
+
+    Writes are sent right away. Those that fail are kept per object ID (a
+    newer command for the same object replaces the queued one) and saved to
+    HA storage so they survive a restart. While commands are queued, new ones
+    are queued behind them instead of waiting for their own timeout.
+    :meth:`async_drain` replays them one by one once the controller answers
+    again. Commands older than ``ttl`` seconds are dropped; a ``ttl`` of 0
+    disables queueing.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, api: DivusDplusApi, entry_id: str, ttl: float
+    ) -> None:
+        self._api = api
+        self._ttl = ttl
+        self._store: Store[dict] = Store(
+            hass, COMMAND_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.commands"
+        )
+        # Object ID -> (value, expiry as a Unix timestamp), oldest first
+        self._pending: dict[str, tuple[str, float]] = {}
+        self._draining = False
+
+    @property
+    def pending(self) -> int:
+        """Return the number of queued commands."""
+        return len(self._pending)
+
+    async def async_load(self) -> None:
+        """Restore the commands queued before the last shutdown."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        self._pending = {
+            command["id"]: (command["value"], command["expires"])
+            for command in stored["commands"]
+        }
+        self._drop_expired()
+        if self._pending:
+            _LOGGER.info("Restored %d queued DIVUS D+ commands", len(self._pending))
+
+    async def async_send(self, values: Mapping[str, str]) -> dict[str, WriteResultDto]:
+        """Write the values now, queueing those the controller did not take."""
+        # A new command always supersedes a queued one for the same object
+        superseded = [x for x in values if self._pending.pop(x, None) is not None]
+
+        if self._ttl and self._pending:
+            await self._async_enqueue(values)
+            return {
+                device_id: WriteResultDto(device_id, queued=True)
+                for device_id in values
+            }
+        if superseded:
+            # Otherwise a restart would restore and replay the older command
+            await self._async_save()
+
+        results = await self._api.set_values(values)
+        failed = {
+            device_id: values[device_id]
+            for device_id, result in results.items()
+            if not result.success
+        }
+        if failed and self._ttl:
+            await self._async_enqueue(failed)
+            for device_id in failed:
+                results[device_id] = WriteResultDto(device_id, queued=True)
+        return results
+
+    async def async_drain(self) -> None:
+        """Replay queued commands at a controlled rate until one fails."""
+        if self._draining:
+            return
+        self._draining = True
+        try:
+            self._drop_expired()
+            if self._pending:
+                _LOGGER.info("Replaying %d queued commands", len(self._pending))
+            while self._pending:
+                device_id, (value, _) = next(iter(self._pending.items()))
+                try:
+                    await self._api.set_value(device_id, value)
+                except (TimeoutError, aiohttp.ClientError) as err:
+                    _LOGGER.debug(
+                        "Replay of %s failed, retrying later: %s", device_id, err
+                    )
+                    break
+                # A newer command may have replaced it while the write ran
+                if self._pending.get(device_id, (None,))[0] == value:
+                    del self._pending[device_id]
+                await asyncio.sleep(DRAIN_INTERVAL)
+        finally:
+            self._draining = False
+            await self._async_save()
+
+    async def _async_enqueue(self, values: Mapping[str, str]) -> None:
+        expires = time.time() + self._ttl
+        for device_id, value in values.items():
+            self._pending[device_id] = (value, expires)
+        _LOGGER.warning(
+            "DIVUS D+ controller unreachable, queued %d commands (%d pending)",
+            len(values),
+            len(self._pending),
+        )
+        await self._async_save()
+
+    def _drop_expired(self) -> None:
+        now = time.time()
+        expired = [
+            device_id
+            for device_id, (_, expires) in self._pending.items()
+            if expires <= now
+        ]
+        for device_id in expired:
+            del self._pending[device_id]
+        if expired:
+            _LOGGER.warning(
+                "Dropped %d queued commands that expired: %s",
+                len(expired),
+                ", ".join(expired),
+            )
+
+    async def _async_save(self) -> None:
+        await self._store.async_save(
+            {
+                "commands": [
+                    {"id": device_id, "value": value, "expires": expires}
+                    for device_id, (value, expires) in self._pending.items()
+                ]
+            }
+        )
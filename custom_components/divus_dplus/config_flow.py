@@ -1,16 +1,48 @@
+import asyncio
+import logging
 from collections.abc import Mapping
 from typing import Any
 
+import aiohttp
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.config_entries import ConfigFlowResult
 from homeassistant.core import callback
 
+from custom_components.divus_dplus.api import DivusAuthError, DivusDplusApi
 from custom_components.divus_dplus.const import (
     CONF_ADD_GLOBAL_COVER,
     CONF_ADD_ROOM_COVERS,
+    CONF_BRIDGE_URL,
+    CONF_COMMAND_TTL,
+    CONF_EVENT_OBJECT_IDS,
+    CONF_EVENT_ROOMS,
+    CONF_FIRE_EVENTS,
+    CONF_MAX_CONCURRENCY,
+    CONF_MAX_PUBLISH_AGE,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_POLL_CHUNK_SIZE,
+    CONF_RECORD_TRAFFIC,
+    CONF_SCAN_INTERVAL,
+    CONF_STALE_GRACE_PERIOD,
+    CONF_TEMPERATURE_DEADBAND,
+    CONF_TRACE_SAMPLE_RATE,
+    DEFAULT_COMMAND_TTL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MAX_PUBLISH_AGE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_POLL_CHUNK_SIZE,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STALE_GRACE_PERIOD,
+    DEFAULT_TEMPERATURE_DEADBAND,
     DOMAIN,
 )
+from custom_components.divus_dplus.dtos import ProbeResultDto
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds the connection check may take before the host counts as unreachable
+PROBE_TIMEOUT = 30
 
 
 def _covers_schema(defaults: Mapping[str, Any]) -> vol.Schema:
@@ -28,18 +60,126 @@ def _covers_schema(defaults: Mapping[str, Any]) -> vol.Schema:
     )
 
 
+def _polling_schema(defaults: Mapping[str, Any]) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_SCAN_INTERVAL,
+                default=defaults.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Required(
+                CONF_MAX_CONCURRENCY,
+                default=defaults.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+            vol.Required(
+                CONF_POLL_CHUNK_SIZE,
+                default=defaults.get(CONF_POLL_CHUNK_SIZE, DEFAULT_POLL_CHUNK_SIZE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1)),
+            vol.Required(
+                CONF_STALE_GRACE_PERIOD,
+                default=defaults.get(
+                    CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(
+                CONF_COMMAND_TTL,
+                default=defaults.get(CONF_COMMAND_TTL, DEFAULT_COMMAND_TTL),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(
+                CONF_TEMPERATURE_DEADBAND,
+                default=defaults.get(
+                    CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND
+                ),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Required(
+                CONF_MIN_PUBLISH_INTERVAL,
+                default=defaults.get(
+                    CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+            vol.Required(
+                CONF_MAX_PUBLISH_AGE,
+                default=defaults.get(CONF_MAX_PUBLISH_AGE, DEFAULT_MAX_PUBLISH_AGE),
+            ): vol.All(vol.Coerce(int), vol.Range(min=0)),
+        }
+    )
+
+
+def _events_schema(defaults: Mapping[str, Any]) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_FIRE_EVENTS,
+                default=defaults.get(CONF_FIRE_EVENTS, False),
+            ): bool,
+            vol.Optional(
+                CONF_EVENT_ROOMS,
+                default=defaults.get(CONF_EVENT_ROOMS, ""),
+            ): str,
+            vol.Optional(
+                CONF_EVENT_OBJECT_IDS,
+                default=defaults.get(CONF_EVENT_OBJECT_IDS, ""),
+            ): str,
+        }
+    )
+
+
+def _debug_schema(defaults: Mapping[str, Any]) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Required(
+                CONF_RECORD_TRAFFIC,
+                default=defaults.get(CONF_RECORD_TRAFFIC, False),
+            ): bool,
+            vol.Required(
+                CONF_TRACE_SAMPLE_RATE,
+                default=defaults.get(CONF_TRACE_SAMPLE_RATE, 0.0),
+            ): vol.All(vol.Coerce(float), vol.Range(min=0, max=1)),
+        }
+    )
+
+
+async def _async_probe(data: Mapping[str, Any]) -> ProbeResultDto:
+    """Log in to the controller and time a few typical requests."""
+    api = DivusDplusApi(
+        data["host"], data.get("username", ""), data.get("password", "")
+    )
+    try:
+        async with asyncio.timeout(PROBE_TIMEOUT):
+            return await api.probe()
+    finally:
+        await api.close()
+
+
 class DivusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
     def __init__(self) -> None:
         self._data: dict = {}
+        self._probe: ProbeResultDto | None = None
 
     async def async_step_user(self, user_input: dict | None = None) -> ConfigFlowResult:
         errors = {}
 
         if user_input is not None:
-            self._data = user_input
-            return await self.async_step_covers()
+            try:
+                self._probe = await _async_probe(user_input)
+            except DivusAuthError:
+                errors["base"] = "invalid_auth"
+            except (TimeoutError, aiohttp.ClientError) as err:
+                _LOGGER.debug("Could not connect to %s: %s", user_input["host"], err)
+                errors["base"] = "cannot_connect"
+            except Exception:
+                _LOGGER.exception("Unexpected answer from %s", user_input["host"])
+                errors["base"] = "unknown"
+            else:
+                _LOGGER.debug(
+                    "Probed %s, suggesting %s",
+                    user_input["host"],
+                    self._probe.suggested_options(),
+                )
+                self._data = user_input
+                return await self.async_step_covers()
 
         schema = vol.Schema(
             {
@@ -54,15 +194,22 @@ class DivusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict | None = None
     ) -> ConfigFlowResult:
         if user_input is not None:
+            suggested = self._probe.suggested_options() if self._probe else {}
             return self.async_create_entry(
                 title="DIVUS D+",
                 data=self._data,
-                options=user_input,
+                options={**suggested, **user_input},
             )
 
+        probe = self._probe
         return self.async_show_form(
             step_id="covers",
             data_schema=_covers_schema({}),
+            description_placeholders={
+                "login": f"{probe.login * 1000:.0f}" if probe else "-",
+                "surroundings": f"{probe.surroundings * 1000:.0f}" if probe else "-",
+                "states": f"{probe.multi_state * 1000:.0f}" if probe else "-",
+            },
         )
 
     @staticmethod
@@ -76,6 +223,7 @@ class DivusConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class DivusOptionsFlow(config_entries.OptionsFlow):
     def __init__(self) -> None:
         self._credentials: dict = {}
+        self._options: dict = {}
 
     async def async_step_init(self, user_input: dict | None = None) -> ConfigFlowResult:
         if user_input is not None:
@@ -92,19 +240,63 @@ class DivusOptionsFlow(config_entries.OptionsFlow):
                     "password",
                     default=self.config_entry.data.get("password", ""),
                 ): str,
+                vol.Optional(
+                    CONF_BRIDGE_URL,
+                    default=self.config_entry.data.get(CONF_BRIDGE_URL, ""),
+                ): str,
             }
         )
         return self.async_show_form(step_id="init", data_schema=schema)
 
-    async def async_step_covers(self, user_input: dict | None = None) -> ConfigFlowResult:
+    async def async_step_covers(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
+        if user_input is not None:
+            self._options.update(user_input)
+            return await self.async_step_polling()
+
+        return self.async_show_form(
+            step_id="covers",
+            data_schema=_covers_schema(self.config_entry.options),
+        )
+
+    async def async_step_polling(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
+        if user_input is not None:
+            self._options.update(user_input)
+            return await self.async_step_events()
+
+        return self.async_show_form(
+            step_id="polling",
+            data_schema=_polling_schema(self.config_entry.options),
+        )
+
+    async def async_step_events(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
+        if user_input is not None:
+            self._options.update(user_input)
+            return await self.async_step_debug()
+
+        return self.async_show_form(
+            step_id="events",
+            data_schema=_events_schema(self.config_entry.options),
+        )
+
+    async def async_step_debug(
+        self, user_input: dict | None = None
+    ) -> ConfigFlowResult:
         if user_input is not None:
             self.hass.config_entries.async_update_entry(
                 self.config_entry,
                 data={**self.config_entry.data, **self._credentials},
             )
-            return self.async_create_entry(data=user_input)
+            return self.async_create_entry(
+                data={**self.config_entry.options, **self._options, **user_input}
+            )
 
         return self.async_show_form(
-            step_id="covers",
-            data_schema=_covers_schema(self.config_entry.options),
+            step_id="debug",
+            data_schema=_debug_schema(self.config_entry.options),
         )
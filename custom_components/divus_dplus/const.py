@@ -1,5 +1,36 @@
 DOMAIN = "divus_dplus"
-PLATFORMS = ["switch", "light", "cover", "climate", "sensor"]
+PLATFORMS = ["switch", "light", "cover", "climate", "sensor", "scene"]
 
 CONF_ADD_ROOM_COVERS = "add_room_covers"
 CONF_ADD_GLOBAL_COVER = "add_global_cover"
+CONF_BRIDGE_URL = "bridge_url"
+
+CONF_STALE_GRACE_PERIOD = "stale_grace_period"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_MIN_PUBLISH_INTERVAL = "min_publish_interval"
+CONF_MAX_PUBLISH_AGE = "max_publish_age"
+CONF_RECORD_TRAFFIC = "record_traffic"
+CONF_TRACE_SAMPLE_RATE = "trace_sample_rate"
+CONF_SCAN_INTERVAL = "scan_interval"
+CONF_MAX_CONCURRENCY = "max_concurrency"
+CONF_POLL_CHUNK_SIZE = "poll_chunk_size"
+CONF_COMMAND_TTL = "command_ttl"
+CONF_FIRE_EVENTS = "fire_events"
+CONF_EVENT_ROOMS = "event_rooms"
+CONF_EVENT_OBJECT_IDS = "event_object_ids"
+
+DEFAULT_SCAN_INTERVAL = 2
+DEFAULT_STALE_GRACE_PERIOD = 60
+DEFAULT_TEMPERATURE_DEADBAND = 0.1
+DEFAULT_MIN_PUBLISH_INTERVAL = 30
+DEFAULT_MAX_PUBLISH_AGE = 600
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_POLL_CHUNK_SIZE = 200
+DEFAULT_COMMAND_TTL = 600
+
+EVENT_OBJECTS_CHANGED = f"{DOMAIN}_objects_changed"
+
+ATTR_STALE = "stale"
+ATTR_LAST_SUCCESSFUL_POLL = "last_successful_poll"
+ATTR_OPEN_TIME = "open_time"
+ATTR_CLOSE_TIME = "close_time"
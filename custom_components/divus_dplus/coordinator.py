@@ -1,24 +1,75 @@
+import asyncio
 import logging
-from datetime import timedelta
+import time
+from collections.abc import AsyncIterator, Iterable
+from datetime import datetime, timedelta
 from itertools import groupby
 from typing import TYPE_CHECKING, cast
 
+import aiohttp
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
-from custom_components.divus_dplus.api import DivusDplusApi
+from custom_components.divus_dplus.api import DivusDplusApi, DivusQueryRefusedError
+from custom_components.divus_dplus.circuit_breaker import (
+    CircuitState,
+    DivusCircuitBreaker,
+)
+from custom_components.divus_dplus.command_queue import DivusCommandQueue
 from custom_components.divus_dplus.const import (
     CONF_ADD_GLOBAL_COVER,
     CONF_ADD_ROOM_COVERS,
+    CONF_COMMAND_TTL,
+    CONF_EVENT_OBJECT_IDS,
+    CONF_EVENT_ROOMS,
+    CONF_FIRE_EVENTS,
+    CONF_MAX_PUBLISH_AGE,
+    CONF_MIN_PUBLISH_INTERVAL,
+    CONF_SCAN_INTERVAL,
+    CONF_STALE_GRACE_PERIOD,
+    CONF_TEMPERATURE_DEADBAND,
+    DEFAULT_COMMAND_TTL,
+    DEFAULT_MAX_PUBLISH_AGE,
+    DEFAULT_MIN_PUBLISH_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    DEFAULT_STALE_GRACE_PERIOD,
+    DEFAULT_TEMPERATURE_DEADBAND,
     DOMAIN,
+    EVENT_OBJECTS_CHANGED,
+)
+from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
+from custom_components.divus_dplus.filters import DeadbandFilter
+from custom_components.divus_dplus.hub import async_get_hub
+from custom_components.divus_dplus.quarantine import (
+    DivusQuarantine,
+    async_find_rejected,
+)
+from custom_components.divus_dplus.scheduler import (
+    DivusPollSkippedError,
+    RequestPriority,
 )
+from custom_components.divus_dplus.state_store import DivusStateStore
 
 if TYPE_CHECKING:
+    from custom_components.divus_dplus.cover import DivusDeviceCoverEntity
     from custom_components.divus_dplus.entity import DivusEntity
+    from custom_components.divus_dplus.tracing import DivusSpan
 
 _LOGGER = logging.getLogger(__name__)
 
+TOPOLOGY_STORAGE_VERSION = 1
+
+# Targeted refreshes requested within this many seconds share one request
+REFRESH_MERGE_WINDOW = 0.1
+
+# Minimum seconds between two searches for objects that break the poll
+ISOLATION_COOLDOWN = 60
+
 
 class DivusCoordinator(DataUpdateCoordinator):
     def __init__(
@@ -28,34 +79,474 @@ class DivusCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name="divus_dplus",
-            update_interval=timedelta(seconds=2),
+            # The hub runs the poll timer, staggered against other entries
+            update_interval=None,
             always_update=True,
         )
 
         self.hass = hass
         self.api = api
         self.entry = entry
-        self.devices: list[DivusEntity]
+        self.hub = async_get_hub(hass)
+        self.poll_interval = timedelta(
+            seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        )
+        self.devices: list[DivusEntity] = []
+        self._all_cover_members: list[DivusDeviceCoverEntity] = []
+        self._tracked_entities: set[DivusEntity] = set()
+        self.poll_ids: list[str] = []
+        self.states = DivusStateStore()
+
+        self.breaker = DivusCircuitBreaker()
+        self.stale_grace_period = timedelta(
+            seconds=entry.options.get(
+                CONF_STALE_GRACE_PERIOD, DEFAULT_STALE_GRACE_PERIOD
+            )
+        )
+        self.last_successful_poll: datetime | None = None
+        self.is_stale = False
+        self.commands = DivusCommandQueue(
+            hass,
+            api,
+            entry.entry_id,
+            entry.options.get(CONF_COMMAND_TTL, DEFAULT_COMMAND_TTL),
+        )
+
+        self._poll_span: DivusSpan | None = None
+        self._refresh_ids: set[str] = set()
+        self._refresh_task: asyncio.Task[None] | None = None
+
+        self.quarantine = DivusQuarantine()
+        self._isolating = False
+        self._isolated_at: float | None = None
+        self._reprobing = False
+
+        # Object ID -> name of its room, for change events
+        self._object_rooms: dict[str, str] = {}
+        self._fire_events = entry.options.get(CONF_FIRE_EVENTS, False)
+        self._event_rooms = {
+            room.casefold() for room in _split(entry.options.get(CONF_EVENT_ROOMS, ""))
+        }
+        self._event_object_ids = _split(entry.options.get(CONF_EVENT_OBJECT_IDS, ""))
+        # Objects that change events are limited to, None for all polled ones
+        self._event_ids: set[str] | None = None
+
+        self._topology_store: Store[dict] = Store(
+            hass, TOPOLOGY_STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}.topology"
+        )
+        self.topology_from_cache = False
+
+    @callback
+    def async_track_entity(self, entity: "DivusEntity") -> None:
+        """Add the objects of an entity that was added to HA to the poll set."""
+        self._tracked_entities.add(entity)
+        self._update_poll_ids()
+
+    @callback
+    def async_untrack_entity(self, entity: "DivusEntity") -> None:
+        """Drop the objects of a removed or disabled entity from the poll set."""
+        self._tracked_entities.discard(entity)
+        self._update_poll_ids()
+
+    def _update_poll_ids(self) -> None:
+        device_ids = [dev.update_device_ids for dev in self._tracked_entities]
+        device_ids = {x for xs in device_ids for x in xs}
+        if self._fire_events and (self._event_rooms or self._event_object_ids):
+            # Objects picked for change events are polled even without an entity
+            self._event_ids = self._event_object_ids | {
+                device_id
+                for device_id, room in self._object_rooms.items()
+                if room.casefold() in self._event_rooms
+            }
+            device_ids |= self._event_ids
+        self.poll_ids = sorted(x for x in device_ids if x != "")
+        self.quarantine.retain(device_ids)
+        _LOGGER.debug(
+            "Polling %d objects of %d entities",
+            len(self.poll_ids),
+            len(self._tracked_entities),
+        )
 
     async def _async_update_data(self) -> None:
-        device_ids = [dev.update_device_ids for dev in self.devices]
-        device_ids = [x for xs in device_ids for x in xs]
-        device_ids = [x for x in device_ids if x != ""]
-        states = await self.api.get_states(device_ids)
+        device_ids = [x for x in self.poll_ids if x not in self.quarantine]
+        if self.quarantine.due():
+            self._async_start_reprobe()
+        if not device_ids:
+            return
+
+        if not self.breaker.allow_request():
+            self._serve_stale(None)
+            return
+
+        # A poll must never outlive its own interval, otherwise a stalled box
+        # piles up requests while the timer keeps firing.
+        deadline = self.poll_interval.total_seconds()
+        span = self.api.tracer.start("poll", objects=len(device_ids))
+        try:
+            with span.activate():
+                async with asyncio.timeout(deadline):
+                    if self.breaker.state == CircuitState.HALF_OPEN:
+                        await self.api.get_states(device_ids[:1])
+                    states = await self.api.get_states(device_ids)
+            if not states:
+                # A box that is up but chokes on the query (unparsable body,
+                # HTTP 500) returns no rows, which is no successful poll either
+                msg = "Controller returned no states"
+                raise DivusQueryRefusedError(msg)  # noqa: TRY301
+        except DivusPollSkippedError as err:
+            span.finish(err)
+            _LOGGER.debug("Skipping poll, a command is in flight")
+            return
+        except (TimeoutError, aiohttp.ClientError, DivusQueryRefusedError) as err:
+            span.finish(err)
+            self.breaker.record_failure()
+            if isinstance(err, (aiohttp.ClientResponseError, DivusQueryRefusedError)):
+                # Maybe a single bad ID makes the controller refuse the query
+                self._async_start_isolation(device_ids, answered=False)
+            self._serve_stale(err)
+            return
+
+        self.breaker.record_success()
+        self.last_successful_poll = dt_util.utcnow()
+        self.is_stale = False
+        if self.commands.pending:
+            self.entry.async_create_background_task(
+                self.hass, self.commands.async_drain(), f"{DOMAIN} command replay"
+            )
+
+        returned = {state.id for state in states}
+        if suspects := [x for x in device_ids if x not in returned]:
+            self._async_start_isolation(suspects, answered=True)
+
+        # Entities pick up their changed objects from the store when notified.
+        changes = self._store_states(device_ids, states)
+        span.attributes["changed"] = len(changes)
+        span.event("stored")
+        # Finished once the entities have been notified
+        self._poll_span = span
+        _LOGGER.debug("%d of %d objects changed", len(changes), len(states))
+
+    async def async_refresh_objects(self, device_ids: Iterable[str]) -> None:
+        """
+        Poll just these objects now, e.g. for homeassistant.update_entity.
+
+        Requests arriving within REFRESH_MERGE_WINDOW of each other are merged
+        into a single state query.
+        """
+        self._refresh_ids.update(x for x in device_ids if x)
+        if not self._refresh_ids:
+            return
+        if self._refresh_task is None:
+            self._refresh_task = self.hass.async_create_task(
+                self._async_refresh_merged(), f"{DOMAIN} targeted refresh"
+            )
+        # One caller giving up must not cancel the refresh for the others
+        await asyncio.shield(self._refresh_task)
+
+    async def _async_refresh_merged(self) -> None:
+        await asyncio.sleep(REFRESH_MERGE_WINDOW)
+        device_ids = sorted(self._refresh_ids)
+        self._refresh_ids.clear()
+        self._refresh_task = None
+
+        with self.api.tracer.span("refresh", objects=len(device_ids)) as span:
+            try:
+                states = await self.api.get_states(device_ids, RequestPriority.REFRESH)
+            except (TimeoutError, aiohttp.ClientError) as err:
+                msg = f"Could not refresh DIVUS D+ objects: {err}"
+                raise HomeAssistantError(msg) from err
+            changes = self._store_states(device_ids, states)
+            span.event("stored")
+            self.async_update_listeners()
+            span.event("dispatched")
+        _LOGGER.debug("Refreshed %d objects, %d changed", len(device_ids), len(changes))
+
+    def _store_states(
+        self, device_ids: list[str], states: list[DeviceStateDto]
+    ) -> list[tuple[DeviceStateDto | None, DeviceStateDto]]:
+        """Store polled states and return the (old, new) pairs that changed."""
+        # Objects the controller left out of its answer are unavailable
+        returned = {state.id for state in states}
+        missing = self.states.mark_missing(x for x in device_ids if x not in returned)
+        return self._update_states([*states, *missing])
+
+    def _update_states(
+        self, states: list[DeviceStateDto]
+    ) -> list[tuple[DeviceStateDto | None, DeviceStateDto]]:
+        """Store states, announce the changes and return them as (old, new) pairs."""
+        changes = self.states.update(states)
+        if self._fire_events and changes:
+            self._async_fire_changes(changes)
+        return changes
+
+    @callback
+    def _async_fire_changes(
+        self, changes: list[tuple[DeviceStateDto | None, DeviceStateDto]]
+    ) -> None:
+        """Fire one event carrying every changed object of interest."""
+        objects = [
+            {
+                "id": new.id,
+                "room": self._object_rooms.get(new.id),
+                "old_value": old.current_value if old is not None else None,
+                "new_value": new.current_value,
+                "available": new.available,
+            }
+            for old, new in changes
+            if self._event_ids is None or new.id in self._event_ids
+        ]
+        if objects:
+            self.hass.bus.async_fire(
+                EVENT_OBJECTS_CHANGED,
+                {"entry_id": self.entry.entry_id, "objects": objects},
+            )
+
+    @callback
+    def _async_start_isolation(self, device_ids: list[str], *, answered: bool) -> None:
+        """Search the objects for IDs that break the poll, at most once a minute."""
+        now = time.monotonic()
+        # While the breaker is backing off, the controller itself is failing
+        if (
+            self.breaker.state != CircuitState.CLOSED
+            or self._isolating
+            or (
+                self._isolated_at is not None
+                and now - self._isolated_at < ISOLATION_COOLDOWN
+            )
+        ):
+            return
+        self._isolating = True
+        self._isolated_at = now
+        self.entry.async_create_background_task(
+            self.hass,
+            self._async_isolate(device_ids, answered=answered),
+            f"{DOMAIN} bad object isolation",
+        )
+
+    async def _async_isolate(self, device_ids: list[str], *, answered: bool) -> None:
+        """Quarantine the objects the controller will not answer for."""
+        try:
+            with self.api.tracer.span("isolate", objects=len(device_ids)):
+                bad = await async_find_rejected(
+                    device_ids,
+                    self._async_query,
+                    answered=answered,
+                    # An open breaker means the controller itself is failing
+                    keep_going=lambda: self.breaker.state == CircuitState.CLOSED,
+                )
+        except (TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Search for objects that break the poll aborted: %s", err)
+            return
+        finally:
+            self._isolating = False
+
+        if bad is None:
+            _LOGGER.debug("Controller refuses queries as a whole, not quarantining")
+            return
+        if added := self.quarantine.add(bad):
+            self._update_states(self.states.mark_missing(added))
+            self.async_update_listeners()
+
+    @callback
+    def _async_start_reprobe(self) -> None:
+        if self._reprobing:
+            return
+        self._reprobing = True
+        self.entry.async_create_background_task(
+            self.hass, self._async_reprobe(), f"{DOMAIN} quarantine probe"
+        )
+
+    async def _async_reprobe(self) -> None:
+        """Query each quarantined object that is due on its own."""
+        released: list[DeviceStateDto] = []
+        try:
+            for device_id in self.quarantine.due():
+                if states := await self._async_query([device_id]):
+                    self.quarantine.release(device_id)
+                    released.extend(states)
+                else:
+                    self.quarantine.record_failed_probe(device_id)
+        except (TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Probing quarantined objects aborted: %s", err)
+        finally:
+            self._reprobing = False
+
+        if released and self._update_states(released):
+            self.async_update_listeners()
 
-        for state in states:
-            devices = [dev for dev in self.devices if state.id in dev.update_device_ids]
-            for device in devices:
-                device.update_state(state)
+    async def _async_query(self, device_ids: list[str]) -> list[DeviceStateDto]:
+        """Return the states of the objects, empty if the query was refused."""
+        try:
+            return await self.api.get_states(device_ids, RequestPriority.REFRESH)
+        except aiohttp.ClientResponseError:
+            return []
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the entities, timing it as the last step of a traced poll."""
+        span, self._poll_span = self._poll_span, None
+        super().async_update_listeners()
+        if span is not None:
+            span.event("dispatched")
+            span.finish()
+
+    def temperature_filter(self) -> DeadbandFilter:
+        """Return a new update filter for one temperature object."""
+        options = self.entry.options
+        return DeadbandFilter(
+            deadband=options.get(
+                CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND
+            ),
+            min_interval=options.get(
+                CONF_MIN_PUBLISH_INTERVAL, DEFAULT_MIN_PUBLISH_INTERVAL
+            ),
+            max_age=options.get(CONF_MAX_PUBLISH_AGE, DEFAULT_MAX_PUBLISH_AGE),
+        )
+
+    def _serve_stale(self, err: Exception | None) -> None:
+        """Keep serving last-known values until the grace period runs out."""
+        now = dt_util.utcnow()
+        if (
+            self.last_successful_poll is None
+            or now - self.last_successful_poll > self.stale_grace_period
+        ):
+            msg = f"DIVUS D+ controller unreachable: {err or 'backing off'}"
+            raise UpdateFailed(msg)
+
+        if not self.is_stale:
+            _LOGGER.warning(
+                "DIVUS D+ poll failed (%s), serving last known values for up to %s",
+                err or "backing off",
+                self.stale_grace_period,
+            )
+        self.is_stale = True
 
     async def async_config_entry_first_refresh(self) -> None:
+        await self.commands.async_load()
+        cached = await self._topology_store.async_load()
+        if cached:
+            # Build entities from the last known topology so they are usable
+            # (with restored state) right away; discovery runs in the background.
+            api_devices = [DeviceDto.from_dict(device) for device in cached["devices"]]
+            self.topology_from_cache = True
+            _LOGGER.info("Using cached topology with %d devices", len(api_devices))
+            self.entry.async_create_background_task(
+                self.hass,
+                self._async_refresh_topology(api_devices),
+                f"{DOMAIN} topology refresh",
+            )
+            self._build_entities(api_devices)
+        else:
+            # Build entities room by room as discovery streams in. Setup only
+            # waits for the first room, so connection errors still surface.
+            # The discovery slot is held until the last room is in.
+            await self.hub.discovery.acquire()
+            rooms = self.api.iter_rooms()
+            try:
+                first_room = await anext(rooms, None)
+            except BaseException:
+                self.hub.discovery.release()
+                raise
+            # Discovery carries each object's CURRENT_VALUE, so it counts as a poll
+            self.last_successful_poll = dt_util.utcnow()
+            if first_room is not None:
+                self._async_add_room(first_room)
+            self.entry.async_create_background_task(
+                self.hass,
+                self._async_stream_rooms(rooms, first_room or []),
+                f"{DOMAIN} discovery",
+            )
+
+        self.hass.data.setdefault(DOMAIN, {})[self.entry.entry_id] = {
+            "api": self.api,
+            "coordinator": self,
+        }
+
+    @property
+    def new_entities_signal(self) -> str:
+        """Return the dispatcher signal announcing entities of a new room."""
+        return f"{DOMAIN}_{self.entry.entry_id}_new_entities"
+
+    async def _async_stream_rooms(
+        self, rooms: AsyncIterator[list[DeviceDto]], api_devices: list[DeviceDto]
+    ) -> None:
+        """Add the remaining rooms as they are discovered, then the global cover."""
+        started = time.monotonic()
+        try:
+            async for room in rooms:
+                self._async_add_room(room)
+                api_devices.extend(room)
+        except (TimeoutError, aiohttp.ClientError) as err:
+            # Rooms found so far stay usable; without a saved topology the
+            # next start discovers everything again.
+            _LOGGER.warning("DIVUS D+ discovery aborted: %s", err)
+            return
+        finally:
+            self.hub.discovery.release()
+
+        global_cover = self._build_global_cover()
+        if global_cover is not None:
+            self.devices.append(global_cover)
+            async_dispatcher_send(self.hass, self.new_entities_signal, [global_cover])
+        _LOGGER.info(
+            "Discovered %d devices in %.1f s",
+            len(api_devices),
+            time.monotonic() - started,
+        )
+        await self._async_save_topology(api_devices)
+
+    @callback
+    def _async_add_room(self, api_devices: list[DeviceDto]) -> None:
+        if not api_devices:
+            return
+        self.states.update(_discovered_states(api_devices))
+        self._record_rooms(api_devices)
+        entities = self._build_room_entities(api_devices)
+        self.devices.extend(entities)
+        async_dispatcher_send(self.hass, self.new_entities_signal, entities)
+
+    async def _async_save_topology(self, api_devices: list[DeviceDto]) -> None:
+        await self._topology_store.async_save(
+            {"devices": [device.to_dict() for device in api_devices]}
+        )
+
+    async def _async_refresh_topology(self, cached_devices: list[DeviceDto]) -> None:
+        """Rediscover the installation and reload if it changed since the cache."""
+        try:
+            async with self.hub.discovery:
+                api_devices = await self.api.get_devices()
+        except (TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.warning("Could not refresh DIVUS D+ topology: %s", err)
+            return
+
+        await self._async_save_topology(api_devices)
+        if _topology_signature(api_devices) != _topology_signature(cached_devices):
+            _LOGGER.info("DIVUS D+ topology changed, reloading entry")
+            self.hass.config_entries.async_schedule_reload(self.entry.entry_id)
+
+    def _record_rooms(self, api_devices: list[DeviceDto]) -> None:
+        """Remember the room of every object, and poll those picked for events."""
+        for device in api_devices:
+            for device_id in [sub["ID"] for sub in device.sub_elements] or [device.id]:
+                self._object_rooms[device_id] = device.parentName
+        if self._fire_events and (self._event_rooms or self._event_object_ids):
+            self._update_poll_ids()
+
+    def _build_entities(self, api_devices: list[DeviceDto]) -> None:
+        self._record_rooms(api_devices)
+        for _, devices in groupby(api_devices, lambda d: d.parentName):
+            self.devices.extend(self._build_room_entities(list(devices)))
+        global_cover = self._build_global_cover()
+        if global_cover is not None:
+            self.devices.append(global_cover)
+
+    def _build_room_entities(self, devices: list[DeviceDto]) -> list["DivusEntity"]:
         # Dynamic imports to avoid circular dependencies
         from custom_components.divus_dplus.climate import (  # noqa: PLC0415
             DivusClimateEntity,
         )
         from custom_components.divus_dplus.cover import (  # noqa: PLC0415
             DivusDeviceCoverEntity,
-            DivusGlobalCoverEntity,
             DivusRoomCoverEntity,
         )
         from custom_components.divus_dplus.light import (  # noqa: PLC0415
@@ -63,6 +554,9 @@ class DivusCoordinator(DataUpdateCoordinator):
             DivusDimLightEntity,
             DivusSwitchLightEntity,
         )
+        from custom_components.divus_dplus.scene import (  # noqa: PLC0415
+            DivusSceneEntity,
+        )
         from custom_components.divus_dplus.sensor import (  # noqa: PLC0415
             DivusSensorEntity,
         )
@@ -71,93 +565,118 @@ class DivusCoordinator(DataUpdateCoordinator):
         )
 
         add_room_covers = self.entry.options.get(CONF_ADD_ROOM_COVERS, True)
-        add_global_cover = self.entry.options.get(CONF_ADD_GLOBAL_COVER, True)
-
-        api_devices = await self.api.get_devices()
 
-        self.devices = []
-        all_shutter_long_ids: list[str] = []
-        all_shutter_short_ids: list[str] = []
+        room_name = devices[0].parentName
+        _LOGGER.info("Room '%s' has %d devices.", room_name, len(devices))
 
-        for room_name, devices_list in groupby(api_devices, lambda d: d.parentName):
-            devices = list(devices_list)
-            _LOGGER.info("Room '%s' has %d devices.", room_name, len(devices))
+        room_entities: set[DivusEntity] = set()
+        for device in devices:
+            optional_p = device.json["OPTIONALP"].split("|")
+            category = next((x for x in optional_p if x.startswith("category=")), None)
+            if category:
+                category = category.replace("category=", "").strip("'")
 
-            room_entities: set[DivusEntity] = set()
-            for device in devices:
-                optional_p = device.json["OPTIONALP"].split("|")
-                category = next(
-                    (x for x in optional_p if x.startswith("category=")), None
-                )
-                if category:
-                    category = category.replace("category=", "").strip("'")
-
-                match (device.json["TYPE"], category):
-                    case ("EIBOBJECT", "lighting"):
-                        room_entities.add(DivusSwitchLightEntity(self, device))
-                    case ("CONTAINER", "lighting"):
-                        if device.sub_elements and any(
-                            sub_dev["RENDERING_ID"] == "418"
-                            for sub_dev in device.sub_elements
-                        ):
-                            room_entities.add(DivusColorTempLightEntity(self, device))
-                        elif device.sub_elements and any(
-                            sub_dev["RENDERING_ID"] == "11"
-                            for sub_dev in device.sub_elements
-                        ):
-                            room_entities.add(DivusDimLightEntity(self, device))
-                    case ("EIBOBJECT", _):
-                        room_entities.add(DivusSwitchEntity(self, device))
-                    case ("CONTAINER", "shutters"):
-                        room_entities.add(DivusDeviceCoverEntity(self, device))
-                    case ("CONTAINER", "climate"):
-                        room_entities.add(DivusClimateEntity(self, device))
-                        room_entities.add(DivusSensorEntity(self, device))
-                    case _:
-                        _LOGGER.debug(
-                            "Device '%s' of type '%s' with category '%s' is not supported.",
-                            device.json["NAME"],
-                            device.json["TYPE"],
-                            category,
-                        )
-
-            cover_entities: list[DivusDeviceCoverEntity] = [
-                cast("DivusDeviceCoverEntity", dev)
-                for dev in room_entities
-                if isinstance(dev, DivusDeviceCoverEntity)
-            ]
-            shutter_long_ids = [
-                dev.shutter_long_id for dev in cover_entities if dev.shutter_long_id
-            ]
-            shutter_short_ids = [
-                dev.shutter_short_id for dev in cover_entities if dev.shutter_short_id
-            ]
-            all_shutter_long_ids.extend(shutter_long_ids)
-            all_shutter_short_ids.extend(shutter_short_ids)
-
-            if len(cover_entities) > 1 and add_room_covers:
-                room_entities.add(
-                    DivusRoomCoverEntity(
-                        self,
-                        devices[0].parentId,
-                        f"{room_name} Alle",
-                        shutter_long_ids,
-                        shutter_short_ids,
+            match (device.json["TYPE"], category):
+                case ("EIBOBJECT", "lighting"):
+                    room_entities.add(DivusSwitchLightEntity(self, device))
+                case ("CONTAINER", "lighting"):
+                    if device.sub_elements and any(
+                        sub_dev["RENDERING_ID"] == "418"
+                        for sub_dev in device.sub_elements
+                    ):
+                        room_entities.add(DivusColorTempLightEntity(self, device))
+                    elif device.sub_elements and any(
+                        sub_dev["RENDERING_ID"] == "11"
+                        for sub_dev in device.sub_elements
+                    ):
+                        room_entities.add(DivusDimLightEntity(self, device))
+                case ("SCENARIO", _) | (_, "scenarios"):
+                    room_entities.add(DivusSceneEntity(self, device))
+                case ("EIBOBJECT", _):
+                    room_entities.add(DivusSwitchEntity(self, device))
+                case ("CONTAINER", "shutters"):
+                    room_entities.add(DivusDeviceCoverEntity(self, device))
+                case ("CONTAINER", "climate"):
+                    room_entities.add(DivusClimateEntity(self, device))
+                    room_entities.add(DivusSensorEntity(self, device))
+                case _:
+                    _LOGGER.debug(
+                        "Device '%s' of type '%s' with category '%s' is not supported.",
+                        device.json["NAME"],
+                        device.json["TYPE"],
+                        category,
                     )
-                )
-            self.devices.extend(room_entities)
 
-        if add_global_cover and all_shutter_long_ids:
-            self.devices.append(
-                DivusGlobalCoverEntity(
+        cover_entities: list[DivusDeviceCoverEntity] = [
+            cast("DivusDeviceCoverEntity", dev)
+            for dev in room_entities
+            if isinstance(dev, DivusDeviceCoverEntity)
+        ]
+        self._all_cover_members.extend(cover_entities)
+
+        if len(cover_entities) > 1 and add_room_covers:
+            room_entities.add(
+                DivusRoomCoverEntity(
                     self,
-                    self.entry.entry_id,
-                    all_shutter_long_ids,
-                    all_shutter_short_ids,
+                    devices[0].parentId,
+                    f"{room_name} Alle",
+                    cover_entities,
                 )
             )
+        return list(room_entities)
 
-        self.hass.data.setdefault(DOMAIN, {})[self.entry.entry_id] = {
-            "api": self.api,
-            "coordinator": self,
-        }
+    def _build_global_cover(self) -> "DivusEntity | None":
+        """Return the cover for all shutters, once every room is known."""
+        from custom_components.divus_dplus.cover import (  # noqa: PLC0415
+            DivusGlobalCoverEntity,
+        )
+
+        if not (
+            self.entry.options.get(CONF_ADD_GLOBAL_COVER, True)
+            and any(dev.shutter_long_id for dev in self._all_cover_members)
+        ):
+            return None
+        return DivusGlobalCoverEntity(
+            self,
+            self.entry.entry_id,
+            self._all_cover_members,
+        )
+
+
+def _discovered_states(api_devices: list[DeviceDto]) -> list[DeviceStateDto]:
+    """Return the values that discovery reported for all objects."""
+    states = [
+        DeviceStateDto(sub["ID"], sub["CURRENT_VALUE"])
+        for device in api_devices
+        for sub in device.sub_elements
+        if "CURRENT_VALUE" in sub
+    ]
+    states.extend(
+        DeviceStateDto(device.id, device.json["CURRENT_VALUE"])
+        for device in api_devices
+        if not device.sub_elements and "CURRENT_VALUE" in device.json
+    )
+    return states
+
+
+def _split(value: str) -> set[str]:
+    """Return the entries of a comma-separated option."""
+    return {item.strip() for item in value.split(",") if item.strip()}
+
+
+def _topology_signature(api_devices: list[DeviceDto]) -> list[tuple]:
+    """Return what entity construction depends on, ignoring current values."""
+    return sorted(
+        (
+            device.id,
+            device.parentId,
+            device.parentName,
+            device.json["NAME"],
+            device.json["TYPE"],
+            device.json["OPTIONALP"],
+            tuple(
+                sorted((sub["ID"], sub["RENDERING_ID"]) for sub in device.sub_elements)
+            ),
+        )
+        for device in api_devices
+    )
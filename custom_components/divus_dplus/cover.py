@@ -1,40 +1,63 @@
 import logging
-from typing import Any
+from abc import abstractmethod
+from typing import TYPE_CHECKING, Any
 
+import voluptuous as vol
 from homeassistant.components.cover import (
     CoverDeviceClass,
     CoverEntity,
     CoverEntityFeature,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_CLOSED
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, State, callback
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.restore_state import ExtraStoredData, RestoredExtraData
 
 from custom_components.divus_dplus.coordinator import DivusCoordinator
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
-from custom_components.divus_dplus.entity import DivusEntity
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
+from custom_components.divus_dplus.motion import CoverTravelModel
 
-from .const import DOMAIN
+from .const import ATTR_CLOSE_TIME, ATTR_OPEN_TIME, DOMAIN
+
+if TYPE_CHECKING:
+    from datetime import datetime
 
 _LOGGER = logging.getLogger(__name__)
 
+SERVICE_SET_TRAVEL_TIMES = "set_travel_times"
+
+# How often the estimated position of a moving shutter is published (seconds)
+TRAVEL_UPDATE_INTERVAL = 1
+
 
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
     _LOGGER.info("Setting up DIVUS D+ covers for entry %s", entry.entry_id)
 
-    devices = hass.data[DOMAIN][entry.entry_id]["coordinator"].devices
-    devices = [dev for dev in devices if isinstance(dev, DivusCoverEntity)]
-    async_add_entities(devices)
+    async_add_divus_entities(hass, entry, async_add_entities, DivusCoverEntity)
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_SET_TRAVEL_TIMES,
+        {
+            vol.Required(ATTR_OPEN_TIME): vol.All(vol.Coerce(float), vol.Range(min=0)),
+            vol.Required(ATTR_CLOSE_TIME): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        },
+        "async_set_travel_times",
+    )
 
-class DivusCoverEntity(CoverEntity, CoordinatorEntity, DivusEntity):
-    def __init__(self, coordinator: DivusCoordinator) -> None:
-        super().__init__(coordinator)
-        self.coordinator = coordinator
+
+class DivusCoverEntity(DivusEntity, CoverEntity):
+    def __init__(
+        self, coordinator: DivusCoordinator, device: DeviceDto | None = None
+    ) -> None:
+        super().__init__(coordinator, device)
 
         self._attr_assumed_state = True
         self._attr_device_class = CoverDeviceClass.SHUTTER
@@ -46,12 +69,19 @@ class DivusCoverEntity(CoverEntity, CoordinatorEntity, DivusEntity):
             | CoverEntityFeature.CLOSE_TILT
         )
 
+    async def _async_set_all(self, device_ids: list[str], value: str) -> None:
+        """Send the same value to many shutters at once so they move together."""
+        await self._async_set_values(dict.fromkeys(device_ids, value))
+
+    @abstractmethod
+    async def async_set_travel_times(self, open_time: float, close_time: float) -> None:
+        """Set how long the shutter takes to open and close fully (0 = unknown)."""
+
 
 class DivusDeviceCoverEntity(DivusCoverEntity):
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
 
-        DivusEntity.__init__(self, device)
         self._attr_unique_id = coordinator.entry.entry_id + "_" + device.id
         self._attr_name = device.json["NAME"]
 
@@ -96,61 +126,334 @@ class DivusDeviceCoverEntity(DivusCoverEntity):
             self.shutter_short_id,
             self.position_device_id,
         }
+        self.groups: list[DivusCoverGroupEntity] = []
+        self._moved_at: datetime | None = None
+        self._polled_position = self._attr_current_cover_position
+        # Last available polled value of the up/down object
+        self._polled_long: int | float | str | None = None
+        self._travel: CoverTravelModel | None = None
+        self._cancel_travel_update: CALLBACK_TYPE | None = None
         _LOGGER.debug("Adding cover device: %s", self._attr_name)
 
+    async def async_added_to_hass(self) -> None:
+        """Restore the travel times set through the service."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self._async_cancel_travel_update)
+        extra_data = await self.async_get_last_extra_data()
+        if extra_data is not None:
+            travel_times = extra_data.as_dict()
+            self._set_travel_times(
+                travel_times.get(ATTR_OPEN_TIME, 0),
+                travel_times.get(ATTR_CLOSE_TIME, 0),
+            )
+
+    @property
+    def extra_restore_state_data(self) -> ExtraStoredData | None:
+        if self._travel is None:
+            return None
+        return RestoredExtraData(
+            {
+                ATTR_OPEN_TIME: self._travel.open_time,
+                ATTR_CLOSE_TIME: self._travel.close_time,
+            }
+        )
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        attributes = super().extra_state_attributes
+        if self._travel is None:
+            return attributes
+        return {
+            **(attributes or {}),
+            ATTR_OPEN_TIME: self._travel.open_time,
+            ATTR_CLOSE_TIME: self._travel.close_time,
+        }
+
+    async def async_set_travel_times(self, open_time: float, close_time: float) -> None:
+        self._set_travel_times(open_time, close_time)
+        self.async_write_ha_state()
+
+    def _set_travel_times(self, open_time: float, close_time: float) -> None:
+        self._async_cancel_travel_update()
+        self._travel = (
+            CoverTravelModel(open_time, close_time)
+            if open_time and close_time
+            else None
+        )
+
     async def async_open_cover(self) -> None:
         """Open the cover."""
-        await self.coordinator.api.set_value(self.shutter_long_id, "0")
+        if await self._async_set_values({self.shutter_long_id: "0"}):
+            self._async_start_travel(1)
         _LOGGER.debug("Opened cover device: %s", self._attr_name)
 
     async def async_close_cover(self) -> None:
         """Close the cover."""
-        await self.coordinator.api.set_value(self.shutter_long_id, "1")
+        if await self._async_set_values({self.shutter_long_id: "1"}):
+            self._async_start_travel(-1)
         _LOGGER.debug("Closed cover device: %s", self._attr_name)
 
     async def async_stop_cover(self) -> None:
         """Stop the cover."""
-        await self.coordinator.api.set_value(self.shutter_short_id, "1")
+        await self._async_set_values({self.shutter_short_id: "1"})
+        if self._travel is not None and self._travel.direction:
+            self._travel.stop()
+            self._async_update_travel()
         _LOGGER.debug("Stopped cover device: %s", self._attr_name)
 
     async def async_open_cover_tilt(self) -> None:
         """Tilt open the cover."""
-        await self.coordinator.api.set_value(self.shutter_short_id, "0")
+        await self._async_set_values({self.shutter_short_id: "0"})
         _LOGGER.debug("Tilt opened cover device: %s", self._attr_name)
 
     async def async_close_cover_tilt(self) -> None:
         """Tilt close the cover."""
-        await self.coordinator.api.set_value(self.shutter_short_id, "1")
+        await self._async_set_values({self.shutter_short_id: "1"})
         _LOGGER.debug("Tilt closed cover device: %s", self._attr_name)
 
     async def async_set_cover_position(self, **kwargs: Any) -> None:
         """Set the cover position."""
         if "position" in kwargs and self.position_device_id:
             position = 100 - kwargs["position"]
-            await self.coordinator.api.set_value(self.position_device_id, str(position))
+            sent = await self._async_set_values(
+                {self.position_device_id: str(position)}
+            )
+            current = self._attr_current_cover_position
+            if sent and current is not None and current != kwargs["position"]:
+                self._async_start_travel(
+                    1 if kwargs["position"] > current else -1, kwargs["position"]
+                )
             _LOGGER.debug(
                 "Set cover device %s position to %d",
                 self._attr_name,
                 kwargs["position"],
             )
 
+    def restore_state(self, last_state: State) -> None:
+        self._attr_is_closed = last_state.state == STATE_CLOSED
+        position = last_state.attributes.get("current_position")
+        if self.position_device_id and position is not None:
+            self._attr_current_cover_position = position
+        self._notify_groups()
+
     def update_state(self, state: DeviceStateDto) -> None:
         if state.id == self.shutter_long_id:
-            self._attr_is_closed = state.current_value == "1"
-        if state.id == self.position_device_id and state.current_value.isdigit():
-            self._attr_current_cover_position = 100 - int(state.current_value)
+            previous, self._polled_long = self._polled_long, state.value
+            if self._travel is not None and not self.position_device_id:
+                # The only sign of movement, also for wall switch commands. The
+                # first value after a restart or an outage says nothing new.
+                if previous is not None and state.value != previous:
+                    self._async_start_travel(-1 if state.value == 1 else 1)
+            elif not self._is_travelling:
+                self._attr_is_closed = state.value == 1
+        if state.id == self.position_device_id and isinstance(state.value, int):
+            position = 100 - state.value
+            previous = self._polled_position
+            if previous is not None and position != previous:
+                self._moved_at = self.coordinator.last_successful_poll
+                if not self._is_travelling:
+                    self._attr_is_opening = position > previous
+                    self._attr_is_closing = position < previous
+            self._polled_position = position
+            if self._travel is not None and self._is_travelling:
+                # Correct the estimate; the next update continues from here
+                self._travel.sync(position)
+            else:
+                self._attr_current_cover_position = position
+        self._notify_groups()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        moving = self._attr_is_opening or self._attr_is_closing
+        super()._handle_coordinator_update()
+        # A poll after the last movement found the position unchanged
+        if (
+            moving
+            and self._moved_at is not None
+            and self._moved_at != self.coordinator.last_successful_poll
+        ):
+            if self._travel is not None and self._is_travelling:
+                self._travel.stop()
+                self._travel.sync(self._polled_position or 0)
+                self._async_update_travel()
+                return
+            self._attr_is_opening = self._attr_is_closing = False
+            self._notify_groups()
+            self.async_write_ha_state()
+
+    @property
+    def _is_travelling(self) -> bool:
+        return self._travel is not None and self._travel.direction != 0
+
+    @callback
+    def _async_start_travel(self, direction: int, target: int | None = None) -> None:
+        """Estimate the position from the travel times until the shutter stops."""
+        if self._travel is None:
+            return
+        position = self._attr_current_cover_position
+        if position is None:
+            position = 0 if self._attr_is_closed else 100
+        self._travel.start(position, direction, target)
+        # Wait for a poll showing the movement before trusting unchanged ones
+        self._moved_at = None
+        self._async_update_travel()
+
+    @callback
+    def _async_update_travel(self, _now: "datetime | None" = None) -> None:
+        """Publish the estimated position, again every second while moving."""
+        self._cancel_travel_update = None
+        if self._travel is None:
+            return
+        direction = self._travel.direction
+        position = round(self._travel.position())
+        self._attr_current_cover_position = position
+        self._attr_is_closed = position == 0
+        self._attr_is_opening = direction > 0
+        self._attr_is_closing = direction < 0
+        if direction:
+            self._cancel_travel_update = async_call_later(
+                self.hass, TRAVEL_UPDATE_INTERVAL, self._async_update_travel
+            )
+        self._notify_groups()
+        self.async_write_ha_state()
+
+    @callback
+    def _async_cancel_travel_update(self) -> None:
+        if self._cancel_travel_update is not None:
+            self._cancel_travel_update()
+            self._cancel_travel_update = None
+
+    def _notify_groups(self) -> None:
+        for group in self.groups:
+            group.async_member_updated(self)
+
+
+class DivusCoverGroupEntity(DivusCoverEntity):
+    """
+    Cover acting on several shutters at once.
 
+    Its state is aggregated from the member covers, which report every
+    change, so the group needs no polling of its own. Each member's last
+    contribution is kept so an update only adjusts the running totals.
+    """
 
-class DivusGlobalCoverEntity(DivusCoverEntity):
     def __init__(
         self,
         coordinator: DivusCoordinator,
-        entry_id: str,
-        shutter_long_ids: list[str],
-        shutter_short_ids: list[str],
+        members: list[DivusDeviceCoverEntity],
     ) -> None:
         super().__init__(coordinator)
 
+        self.members = members
+        self.shutter_long_ids = [
+            dev.shutter_long_id for dev in members if dev.shutter_long_id
+        ]
+        self.shutter_short_ids = [
+            dev.shutter_short_id for dev in members if dev.shutter_short_id
+        ]
+        self.update_device_ids = set()
+
+        self._contributions: dict[str, tuple[bool | None, int | None, int]] = {}
+        self._known = 0
+        self._closed = 0
+        self._position_sum = 0
+        self._position_count = 0
+        self._opening = 0
+        self._closing = 0
+        self._write_scheduled = False
+        for member in members:
+            member.groups.append(self)
+            self.async_member_updated(member)
+
+    @property
+    def is_closed(self) -> bool | None:
+        if not self._known:
+            return None
+        return self._closed == self._known
+
+    @property
+    def current_cover_position(self) -> int | None:
+        if not self._position_count:
+            return None
+        return round(self._position_sum / self._position_count)
+
+    @property
+    def is_opening(self) -> bool:
+        return self._opening > 0
+
+    @property
+    def is_closing(self) -> bool:
+        return self._closing > 0
+
+    @callback
+    def async_member_updated(self, member: DivusDeviceCoverEntity) -> None:
+        """Replace a member's contribution to the aggregate state."""
+        direction = 1 if member.is_opening else -1 if member.is_closing else 0
+        new = (member.is_closed, member.current_cover_position, direction)
+        old = self._contributions.get(member.device.id)
+        if new == old:
+            return
+        self._contributions[member.device.id] = new
+        if old is not None:
+            self._apply(old, -1)
+        self._apply(new, 1)
+        self._async_schedule_write()
+
+    def _apply(
+        self, contribution: tuple[bool | None, int | None, int], sign: int
+    ) -> None:
+        closed, position, direction = contribution
+        if closed is not None:
+            self._known += sign
+            self._closed += sign * closed
+        if position is not None:
+            self._position_sum += sign * position
+            self._position_count += sign
+        self._opening += sign * (direction > 0)
+        self._closing += sign * (direction < 0)
+
+    def _async_schedule_write(self) -> None:
+        # Members report one by one during a coordinator update; write the
+        # aggregate once after all of them are through.
+        if self.hass is None or self._write_scheduled:
+            return
+        self._write_scheduled = True
+        self.hass.loop.call_soon(self._async_write_aggregate)
+
+    @callback
+    def _async_write_aggregate(self) -> None:
+        self._write_scheduled = False
+        self.async_write_ha_state()
+
+    async def async_update(self) -> None:
+        """Refresh the objects of all member shutters in one request."""
+        await self.coordinator.async_refresh_objects(
+            device_id
+            for member in self.members
+            for device_id in member.update_device_ids
+        )
+
+    async def async_set_travel_times(self, open_time: float, close_time: float) -> None:
+        """Apply the travel times to every member shutter."""
+        for member in self.members:
+            member._set_travel_times(open_time, close_time)  # noqa: SLF001
+            # Members disabled in the registry were never added to HA
+            if member.hass is not None:
+                member.async_write_ha_state()
+
+    def update_state(self, state: DeviceStateDto) -> None:
+        pass
+
+
+class DivusGlobalCoverEntity(DivusCoverGroupEntity):
+    def __init__(
+        self,
+        coordinator: DivusCoordinator,
+        entry_id: str,
+        members: list[DivusDeviceCoverEntity],
+    ) -> None:
+        super().__init__(coordinator, members)
+
         self._attr_unique_id = entry_id + "_global_cover"
         self._attr_name = "Alle Jalousien"
         self._attr_device_info = DeviceInfo(
@@ -161,41 +464,30 @@ class DivusGlobalCoverEntity(DivusCoverEntity):
         self._attr_supported_features = (
             CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
         )
-        self.shutter_long_ids = shutter_long_ids
-        self.shutter_short_ids = shutter_short_ids
-        self._attr_is_closed: bool | None = None
-        self.update_device_ids = set()
         _LOGGER.debug("Adding global cover entity")
 
     async def async_open_cover(self) -> None:
-        for shutter_id in self.shutter_long_ids:
-            await self.coordinator.api.set_value(shutter_id, "0")
+        await self._async_set_all(self.shutter_long_ids, "0")
         _LOGGER.debug("Opened global cover")
 
     async def async_close_cover(self) -> None:
-        for shutter_id in self.shutter_long_ids:
-            await self.coordinator.api.set_value(shutter_id, "1")
+        await self._async_set_all(self.shutter_long_ids, "1")
         _LOGGER.debug("Closed global cover")
 
     async def async_stop_cover(self) -> None:
-        for shutter_id in self.shutter_short_ids:
-            await self.coordinator.api.set_value(shutter_id, "1")
+        await self._async_set_all(self.shutter_short_ids, "1")
         _LOGGER.debug("Stopped global cover")
 
-    def update_state(self, state: DeviceStateDto) -> None:
-        pass
-
 
-class DivusRoomCoverEntity(DivusCoverEntity):
+class DivusRoomCoverEntity(DivusCoverGroupEntity):
     def __init__(
         self,
         coordinator: DivusCoordinator,
         device_id: str,
         name: str,
-        shutter_long_ids: list[str],
-        shutter_short_ids: list[str],
+        members: list[DivusDeviceCoverEntity],
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, members)
 
         self._attr_unique_id = coordinator.entry.entry_id + "_" + device_id
         self._attr_name = name
@@ -204,42 +496,29 @@ class DivusRoomCoverEntity(DivusCoverEntity):
             name=name,
             manufacturer="DIVUS",
         )
-        self.shutter_long_ids = shutter_long_ids
-        self._attr_is_closed: bool | None = None
-        self.shutter_short_ids = shutter_short_ids
-        self.update_device_ids = set(self.shutter_long_ids + self.shutter_short_ids)
         _LOGGER.debug("Adding room cover: %s", self._attr_name)
 
     async def async_open_cover(self) -> None:
         """Open the cover."""
-        for shutter_id in self.shutter_long_ids:
-            await self.coordinator.api.set_value(shutter_id, "0")
+        await self._async_set_all(self.shutter_long_ids, "0")
         _LOGGER.debug("Opened room cover: %s", self._attr_name)
 
     async def async_close_cover(self) -> None:
         """Close the cover."""
-        for shutter_id in self.shutter_long_ids:
-            await self.coordinator.api.set_value(shutter_id, "1")
+        await self._async_set_all(self.shutter_long_ids, "1")
         _LOGGER.debug("Closed room cover: %s", self._attr_name)
 
     async def async_stop_cover(self) -> None:
         """Stop the cover."""
-        for shutter_id in self.shutter_short_ids:
-            await self.coordinator.api.set_value(shutter_id, "1")
+        await self._async_set_all(self.shutter_short_ids, "1")
         _LOGGER.debug("Stopped room cover: %s", self._attr_name)
 
     async def async_open_cover_tilt(self) -> None:
         """Tilt open the cover."""
-        for shutter_id in self.shutter_short_ids:
-            await self.coordinator.api.set_value(shutter_id, "0")
+        await self._async_set_all(self.shutter_short_ids, "0")
         _LOGGER.debug("Tilt opened room cover: %s", self._attr_name)
 
     async def async_close_cover_tilt(self) -> None:
         """Tilt close the cover."""
-        for shutter_id in self.shutter_short_ids:
-            await self.coordinator.api.set_value(shutter_id, "1")
+        await self._async_set_all(self.shutter_short_ids, "1")
         _LOGGER.debug("Tilt closed room cover: %s", self._attr_name)
-
-    def update_state(self, state: DeviceStateDto) -> None:
-        # Nothing to do here for now
-        pass
@@ -0,0 +1,39 @@
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from custom_components.divus_dplus.const import CONF_BRIDGE_URL, DOMAIN
+
+if TYPE_CHECKING:
+    from custom_components.divus_dplus.coordinator import DivusCoordinator
+
+TO_REDACT = {"host", "username", "password", CONF_BRIDGE_URL}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the polling health of a config entry."""
+    coordinator: DivusCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+    governor = coordinator.api.governor
+    last_poll = coordinator.last_successful_poll
+    return {
+        "data": async_redact_data(dict(entry.data), TO_REDACT),
+        "options": dict(entry.options),
+        "polling": {
+            "objects": len(coordinator.poll_ids),
+            "last_successful_poll": last_poll.isoformat() if last_poll else None,
+            "stale": coordinator.is_stale,
+            "circuit": coordinator.breaker.state,
+            "failures": coordinator.breaker.failures,
+        },
+        "governor": {
+            "limit": governor.limit,
+            "latency": round(governor.latency, 3),
+            "error_rate": round(governor.error_rate, 3),
+        },
+        "queued_commands": coordinator.commands.pending,
+        "quarantined_objects": coordinator.quarantine.as_dict(),
+    }
@@ -1,3 +1,15 @@
+import math
+from functools import cached_property
+
+from custom_components.divus_dplus.const import (
+    CONF_MAX_CONCURRENCY,
+    CONF_POLL_CHUNK_SIZE,
+    CONF_SCAN_INTERVAL,
+    DEFAULT_POLL_CHUNK_SIZE,
+    DEFAULT_SCAN_INTERVAL,
+)
+
+
 class DeviceDto:
     def __init__(
         self,
@@ -13,8 +25,128 @@ class DeviceDto:
         self.json = json
         self.sub_elements = sub_elements
 
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "parent_id": self.parentId,
+            "parent_name": self.parentName,
+            "object": self.json,
+            "sub_elements": self.sub_elements,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DeviceDto":
+        return cls(
+            device_id=data["id"],
+            parent_id=data["parent_id"],
+            parent_name=data["parent_name"],
+            json=data["object"],
+            sub_elements=data["sub_elements"],
+        )
+
+
+# Round-trip times (seconds) separating fast, average and slow controllers
+_FAST_RESPONSE = 0.15
+_SLOW_RESPONSE = 0.5
+
+
+def decode_value(raw: str) -> int | float | str:
+    """Decode a CURRENT_VALUE string into an int or float where it is numeric."""
+    try:
+        return int(raw)
+    except ValueError:
+        pass
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
 
 class DeviceStateDto:
-    def __init__(self, device_id: str, current_value: str) -> None:
+    def __init__(
+        self,
+        device_id: str,
+        current_value: str | None,
+        version: int = 0,
+        *,
+        available: bool = True,
+    ) -> None:
         self.id = device_id
         self.current_value = current_value
+        self.version = version
+        # False when the object reported an error or was missing from a poll;
+        # current_value is None if it never reported a value at all
+        self.available = available
+
+    @cached_property
+    def value(self) -> int | float | str | None:
+        """Return the typed value, decoded on first access only."""
+        if self.current_value is None:
+            return None
+        return decode_value(self.current_value)
+
+
+class WriteResultDto:
+    def __init__(
+        self,
+        device_id: str,
+        response: str | None = None,
+        error: str | None = None,
+        *,
+        queued: bool = False,
+    ) -> None:
+        self.id = device_id
+        self.response = response
+        self.error = error
+        # Not sent yet; the command queue delivers it once the box is back
+        self.queued = queued
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class ProbeResultDto:
+    """Median round-trip times (seconds) measured against a controller."""
+
+    def __init__(
+        self,
+        login: float,
+        surroundings: float,
+        single_state: float,
+        multi_state: float,
+        sample_size: int,
+    ) -> None:
+        self.login = login
+        self.surroundings = surroundings
+        self.single_state = single_state
+        self.multi_state = multi_state
+        self.sample_size = sample_size
+
+    def suggested_options(self) -> dict[str, int]:
+        """
+        Derive polling and concurrency options from the measured timings.
+
+        The poll interval leaves the box idle most of the time, slow boxes
+        get fewer parallel requests, and the chunk size balances the fixed
+        cost of a state query against the cost of each additional object.
+        """
+        scan_interval = min(
+            max(math.ceil(self.multi_state * 10), DEFAULT_SCAN_INTERVAL), 30
+        )
+
+        slowest = max(self.surroundings, self.multi_state)
+        max_concurrency = (
+            8 if slowest < _FAST_RESPONSE else 4 if slowest < _SLOW_RESPONSE else 2
+        )
+
+        chunk_size = DEFAULT_POLL_CHUNK_SIZE
+        if self.sample_size > 1 and self.multi_state > self.single_state:
+            per_object = (self.multi_state - self.single_state) / (self.sample_size - 1)
+            chunk_size = min(max(round(self.single_state / per_object), 25), 500)
+
+        return {
+            CONF_SCAN_INTERVAL: scan_interval,
+            CONF_MAX_CONCURRENCY: max_concurrency,
+            CONF_POLL_CHUNK_SIZE: chunk_size,
+        }
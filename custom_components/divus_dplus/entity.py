@@ -1,21 +1,171 @@
-from abc import ABC, abstractmethod
+from abc import abstractmethod
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any
 
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.divus_dplus.const import DOMAIN
+from custom_components.divus_dplus.const import (
+    ATTR_LAST_SUCCESSFUL_POLL,
+    ATTR_STALE,
+    DOMAIN,
+)
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
 
+if TYPE_CHECKING:
+    from custom_components.divus_dplus.coordinator import DivusCoordinator
+    from custom_components.divus_dplus.filters import DeadbandFilter
 
-class DivusEntity(ABC):
+
+def async_add_divus_entities(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+    entity_type: type["DivusEntity"],
+) -> None:
+    """Add a platform's entities now and for every room discovered later."""
+    coordinator: DivusCoordinator = hass.data[DOMAIN][entry.entry_id]["coordinator"]
+
+    @callback
+    def _async_add(entities: list[DivusEntity]) -> None:
+        matching = [entity for entity in entities if isinstance(entity, entity_type)]
+        if matching:
+            async_add_entities(matching)
+
+    _async_add(coordinator.devices)
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, coordinator.new_entities_signal, _async_add)
+    )
+
+
+class DivusEntity(CoordinatorEntity["DivusCoordinator"], RestoreEntity):
     """Abstract base class for Divus D+ entities."""
 
-    def __init__(self, device: DeviceDto) -> None:
+    def __init__(
+        self, coordinator: "DivusCoordinator", device: DeviceDto | None = None
+    ) -> None:
         """Store the device and register it in the HA device registry."""
+        super().__init__(coordinator)
+        self.coordinator = coordinator
         self.device = device
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, device.id)},
-            name=device.json["NAME"],
-            manufacturer="DIVUS",
+        if device is not None:
+            self._attr_device_info = DeviceInfo(
+                identifiers={(DOMAIN, device.id)},
+                name=device.json["NAME"],
+                manufacturer="DIVUS",
+            )
+        # Objects in the store up to this version are already reflected.
+        self._seen_version = coordinator.states.version
+        self._written_context: tuple[bool, bool] | None = None
+        # Set while written values are shown that no poll has confirmed yet
+        self._unconfirmed = False
+
+    async def async_added_to_hass(self) -> None:
+        """Start polling this entity's objects once it is live in HA."""
+        await super().async_added_to_hass()
+        if self.coordinator.topology_from_cache:
+            # Values from the cached topology are older than the last state HA
+            # saved at shutdown; the first poll reconciles whatever changed.
+            last_state = await self.async_get_last_state()
+            if last_state is not None and last_state.state not in (
+                STATE_UNAVAILABLE,
+                STATE_UNKNOWN,
+            ):
+                self.restore_state(last_state)
+        self.coordinator.async_track_entity(self)
+        self.async_on_remove(lambda: self.coordinator.async_untrack_entity(self))
+
+    def restore_state(self, last_state: State) -> None:
+        """Apply the state HA saved before the last shutdown."""
+
+    async def async_update(self) -> None:
+        """Poll only this entity's objects instead of the whole installation."""
+        if not self.enabled:
+            return
+        await self.coordinator.async_refresh_objects(self.update_device_ids)
+
+    def _changed_states(self) -> list[DeviceStateDto]:
+        """Return this entity's objects that changed since it last looked."""
+        return self.coordinator.states.changed_since(
+            self.update_device_ids, self._seen_version
+        )
+
+    def _reoffer_held_back(
+        self,
+        changed: list[DeviceStateDto],
+        device_id: str,
+        published: float | None,
+        deadband_filter: "DeadbandFilter",
+    ) -> list[DeviceStateDto]:
+        """
+        Add the object's state to ``changed`` once its filter would publish it.
+
+        The store reports a change only once, so a value the filter held back
+        would otherwise never be offered again, e.g. after ``max_age``.
+        """
+        state = self.coordinator.states.get(device_id)
+        if (
+            state is not None
+            and state.available
+            and state not in changed
+            and float(state.value) != published
+            and deadband_filter.is_due(float(state.value))
+        ):
+            changed.append(state)
+        return changed
+
+    def _current_states(self) -> list[DeviceStateDto]:
+        """Return the last known states of all of this entity's objects."""
+        states = self.coordinator.states
+        return [
+            state
+            for state in map(states.get, self.update_device_ids)
+            if state is not None
+        ]
+
+    @callback
+    def _apply_written(self, values: Mapping[str, str]) -> None:
+        """Show written values right away, until the next poll confirms them."""
+        for device_id, value in values.items():
+            self.update_state(DeviceStateDto(device_id, value))
+        self._unconfirmed = True
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Apply changed objects and write state only if something changed."""
+        if self._unconfirmed:
+            # A write the controller did not apply leaves the store unchanged,
+            # so compare against every object once instead of only changes.
+            self._unconfirmed = False
+            changed = self._current_states()
+        else:
+            changed = self._changed_states()
+        self._seen_version = self.coordinator.states.version
+        for state in changed:
+            if state.available:
+                self.update_state(state)
+
+        context = (self.available, self.coordinator.is_stale)
+        if changed or context != self._written_context:
+            self._written_context = context
+            self.async_write_ha_state()
+
+    @property
+    def available(self) -> bool:
+        """Return False as well when one of the entity's objects has an error."""
+        if not super().available:
+            return False
+        states = self.coordinator.states
+        return all(
+            state is None or state.available
+            for state in map(states.get, self.update_device_ids)
         )
 
     @property
@@ -28,6 +178,31 @@ class DivusEntity(ABC):
         """Set the update IDs that this entity listens to."""
         self._update_device_ids = value
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag last-known values served while the controller is unreachable."""
+        if not self.coordinator.is_stale:
+            return None
+        last_poll = self.coordinator.last_successful_poll
+        return {
+            ATTR_STALE: True,
+            ATTR_LAST_SUCCESSFUL_POLL: last_poll.isoformat() if last_poll else None,
+        }
+
+    async def _async_set_values(self, values: Mapping[str, str]) -> bool:
+        """
+        Write objects concurrently, raising if any write failed.
+
+        Writes the controller did not take are queued and replayed once it is
+        reachable again. Return False if any write was queued.
+        """
+        results = await self.coordinator.commands.async_send(values)
+        failed = [result.id for result in results.values() if not result.success]
+        if failed:
+            msg = f"{self.name}: {len(failed)} of {len(results)} writes failed"
+            raise HomeAssistantError(msg)
+        return not any(result.queued for result in results.values())
+
     @abstractmethod
     def update_state(self, state: DeviceStateDto) -> None:
         """Update the entity's state."""
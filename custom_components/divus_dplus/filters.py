@@ -0,0 +1,60 @@
+import math
+import time
+from collections.abc import Callable
+
+
+class DeadbandFilter:
+    """
+    Decide which polled values of a noisy sensor are worth publishing.
+
+    A value is published when it differs from the last published one by at
+    least ``deadband`` and ``min_interval`` seconds have passed since the last
+    publish. Once ``max_age`` seconds have passed, the current value is
+    published regardless so slow drifts below the deadband still show up.
+    """
+
+    def __init__(
+        self,
+        deadband: float,
+        min_interval: float,
+        max_age: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._deadband = deadband
+        self._min_interval = min_interval
+        self._max_age = max_age
+        self._clock = clock
+
+        self._last_value: float | None = None
+        self._last_time = 0.0
+
+    def accept(self, value: float) -> bool:
+        """Return True (and remember the value) if it should be published."""
+        now = self._clock()
+        if self._last_value is None or self._is_due(value, now):
+            self._last_value = value
+            self._last_time = now
+            return True
+        return False
+
+    def is_due(self, value: float) -> bool:
+        """Return True if accept() would publish the value right now."""
+        return self._is_due(value, self._clock())
+
+    def reset(self) -> None:
+        """Publish the next value unconditionally."""
+        self._last_value = None
+
+    def _is_due(self, value: float, now: float) -> bool:
+        if self._last_value is None:
+            return True
+        age = now - self._last_time
+        if self._max_age and age >= self._max_age:
+            return True
+        if age < self._min_interval:
+            return False
+        delta = abs(value - self._last_value)
+        # 20.2 - 20.1 is 0.0999... in floating point, a full step nonetheless
+        return delta > 0 and (
+            delta >= self._deadband or math.isclose(delta, self._deadband)
+        )
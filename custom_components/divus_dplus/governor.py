@@ -0,0 +1,89 @@
+import logging
+import time
+from collections.abc import Callable
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DivusLoadGovernor:
+    """
+    Size the number of parallel requests to what the D+ controller handles.
+
+    Every response nudges the limit up by ``1 / limit`` (about one extra
+    request per round of ``limit`` responses). A failed request, or one that
+    took longer than ``slow_factor`` times the fastest recent response (and
+    at least ``latency_target`` seconds), cuts the limit by ``decrease``.
+    Cuts happen at most once per ``cooldown`` seconds, so one stall that
+    fails a whole burst of requests halves the limit only once.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        latency_target: float = 0.5,
+        slow_factor: float = 3.0,
+        decrease: float = 0.5,
+        cooldown: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_limit = max(max_limit, min_limit)
+        self._min_limit = min_limit
+        self._latency_target = latency_target
+        self._slow_factor = slow_factor
+        self._decrease = decrease
+        self._cooldown = cooldown
+        self._clock = clock
+
+        self._limit = float(max(self._max_limit // 2, min_limit))
+        self._min_latency: float | None = None
+        self._decreased_at: float | None = None
+        self.latency = 0.0
+        self.error_rate = 0.0
+
+    @property
+    def limit(self) -> int:
+        """Return the number of requests that may currently run at once."""
+        return int(self._limit)
+
+    def record_latency(self, latency: float) -> None:
+        """Feed the duration of a successful request."""
+        self.latency = (
+            latency if not self.latency else 0.8 * self.latency + 0.2 * latency
+        )
+        self.error_rate *= 0.9
+        # Let the baseline creep up so a permanently slower network is
+        # eventually accepted as the new normal.
+        self._min_latency = (
+            latency
+            if self._min_latency is None
+            else min(latency, self._min_latency * 1.01)
+        )
+
+        if latency > max(self._latency_target, self._slow_factor * self._min_latency):
+            self._cut(f"slow response ({latency:.2f} s)")
+        elif self._limit < self._max_limit:
+            self._set_limit(min(self._limit + 1 / self._limit, self._max_limit))
+
+    def record_failure(self) -> None:
+        """Feed a request that failed or timed out."""
+        self.error_rate = 0.9 * self.error_rate + 0.1
+        self._cut("failed request")
+
+    def _cut(self, reason: str) -> None:
+        now = self._clock()
+        if self._decreased_at is not None and now - self._decreased_at < self._cooldown:
+            return
+        self._decreased_at = now
+        self._set_limit(max(self._limit * self._decrease, self._min_limit), reason)
+
+    def _set_limit(self, limit: float, reason: str | None = None) -> None:
+        previous = self.limit
+        self._limit = limit
+        if self.limit != previous:
+            _LOGGER.debug(
+                "Request limit %d -> %d%s",
+                previous,
+                self.limit,
+                f" after {reason}" if reason else "",
+            )
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import math
+from functools import partial
+from typing import TYPE_CHECKING
+
+import aiohttp
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_at
+
+from custom_components.divus_dplus.const import DOMAIN
+
+if TYPE_CHECKING:
+    from custom_components.divus_dplus.coordinator import DivusCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_HUB = f"{DOMAIN}_hub"
+
+# Controllers whose installation is walked at the same time
+MAX_CONCURRENT_DISCOVERIES = 2
+
+
+@callback
+def async_get_hub(hass: HomeAssistant) -> "DivusHub":
+    """Return the hub shared by all DIVUS D+ config entries."""
+    hub: DivusHub | None = hass.data.get(DATA_HUB)
+    if hub is None:
+        hub = hass.data[DATA_HUB] = DivusHub(hass)
+    return hub
+
+
+class DivusHub:
+    """
+    Resources shared by all DIVUS D+ config entries.
+
+    With one entry per controller, independent poll timers tend to fire
+    together and every entry walks its installation at startup at once. The
+    hub instead runs the poll timers of all entries on fixed phases spread
+    evenly over the poll interval, lets the entries share one HTTP session
+    and admits at most ``MAX_CONCURRENT_DISCOVERIES`` discovery walks at a
+    time.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._session: aiohttp.ClientSession | None = None
+        self._session_users: set[str] = set()
+        self._coordinators: dict[str, DivusCoordinator] = {}
+        self._phases: dict[str, float] = {}
+        self._cancel_ticks: dict[str, CALLBACK_TYPE] = {}
+        self._polls: dict[str, asyncio.Task[None]] = {}
+        self._epoch = hass.loop.time()
+        self.discovery = asyncio.Semaphore(MAX_CONCURRENT_DISCOVERIES)
+
+    def session(self, entry_id: str) -> aiohttp.ClientSession:
+        """Return the shared HTTP session, held until the entry releases it."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        self._session_users.add(entry_id)
+        return self._session
+
+    async def async_release_session(self, entry_id: str) -> None:
+        """Close the shared session once no entry uses it any more."""
+        self._session_users.discard(entry_id)
+        if not self._session_users and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @callback
+    def async_add_coordinator(self, coordinator: "DivusCoordinator") -> CALLBACK_TYPE:
+        """Start polling the coordinator; return a callback that stops it."""
+        entry_id = coordinator.entry.entry_id
+        self._coordinators[entry_id] = coordinator
+        self._async_stagger()
+
+        @callback
+        def _async_remove() -> None:
+            self._coordinators.pop(entry_id, None)
+            self._polls.pop(entry_id, None)
+            self._async_stagger()
+
+        return _async_remove
+
+    @callback
+    def _async_stagger(self) -> None:
+        """Spread the poll phases of all entries evenly over their interval."""
+        for cancel in self._cancel_ticks.values():
+            cancel()
+        self._cancel_ticks.clear()
+        entry_ids = sorted(self._coordinators)
+        self._phases = {
+            entry_id: index / len(entry_ids) for index, entry_id in enumerate(entry_ids)
+        }
+        for entry_id in entry_ids:
+            self._async_schedule(entry_id)
+        if len(entry_ids) > 1:
+            _LOGGER.debug("Staggered polls of %d DIVUS D+ entries", len(entry_ids))
+
+    @callback
+    def _async_schedule(self, entry_id: str) -> None:
+        interval = self._coordinators[entry_id].poll_interval.total_seconds()
+        # Ticks sit on a fixed grid, so slow polls never shift the phases
+        offset = self._epoch + self._phases[entry_id] * interval
+        ticks = math.floor((self._hass.loop.time() - offset) / interval) + 1
+        self._cancel_ticks[entry_id] = async_call_at(
+            self._hass, partial(self._async_tick, entry_id), offset + ticks * interval
+        )
+
+    @callback
+    def _async_tick(self, entry_id: str, _now: float) -> None:
+        self._async_schedule(entry_id)
+        poll = self._polls.get(entry_id)
+        if poll is not None and not poll.done():
+            _LOGGER.debug("Previous poll of %s still running, skipping", entry_id)
+            return
+        coordinator = self._coordinators[entry_id]
+        self._polls[entry_id] = coordinator.entry.async_create_background_task(
+            self._hass, coordinator.async_refresh(), f"{DOMAIN} poll"
+        )
@@ -6,16 +6,14 @@ from typing import Any
 from homeassistant.components.light import LightEntity
 from homeassistant.components.light.const import ColorMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.util.color import brightness_to_value, value_to_brightness
 
 from custom_components.divus_dplus.coordinator import DivusCoordinator
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
-from custom_components.divus_dplus.entity import DivusEntity
-
-from .const import DOMAIN
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,19 +23,15 @@ async def async_setup_entry(
 ) -> None:
     _LOGGER.info("Setting up DIVUS D+ lights for entry %s", entry.entry_id)
 
-    devices = hass.data[DOMAIN][entry.entry_id]["coordinator"].devices
-    devices = [dev for dev in devices if isinstance(dev, DivusLightEntity)]
-    async_add_entities(devices)
+    async_add_divus_entities(hass, entry, async_add_entities, DivusLightEntity)
 
 
-class DivusLightEntity(LightEntity, CoordinatorEntity, DivusEntity):
+class DivusLightEntity(DivusEntity, LightEntity):
     _is_on: bool = False
 
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
 
-        DivusEntity.__init__(self, device)
-        self.coordinator = coordinator
         self._attr_unique_id = coordinator.entry.entry_id + "_" + device.id
         self._attr_name = device.json["NAME"]
         _LOGGER.debug("Adding light device: %s of type %s", self._attr_name, type(self))
@@ -46,12 +40,15 @@ class DivusLightEntity(LightEntity, CoordinatorEntity, DivusEntity):
     def is_on(self) -> bool:
         return self._is_on
 
+    def restore_state(self, last_state: State) -> None:
+        self._is_on = last_state.state == STATE_ON
+
     async def async_turn_on(self) -> None:
-        await self.coordinator.api.set_value(self.device.id, "1")
+        await self._async_set_values({self.device.id: "1"})
         _LOGGER.debug("Turned on light device: %s", self._attr_name)
 
     async def async_turn_off(self) -> None:
-        await self.coordinator.api.set_value(self.device.id, "0")
+        await self._async_set_values({self.device.id: "0"})
         _LOGGER.debug("Turned off light device: %s", self._attr_name)
 
 
@@ -76,10 +73,10 @@ class DivusDimLightEntity(DivusLightEntity):
         self.dim_device_id = (
             current_dim_value_device["ID"] if current_dim_value_device else ""
         )
-        self.dim_value = (
-            current_dim_value_device["CURRENT_VALUE"]
+        self.dim_value: int = (
+            int(current_dim_value_device["CURRENT_VALUE"])
             if current_dim_value_device
-            else "0"
+            else 0
         )
 
         current_switch_value_device = next(
@@ -104,14 +101,14 @@ class DivusDimLightEntity(DivusLightEntity):
 
     def update_state(self, state: DeviceStateDto) -> None:
         if state.id == self.switch_device_id:
-            new_value = state.current_value != "0"
+            new_value = state.value != 0
             if new_value != self._is_on:
                 self._is_on = new_value
                 _LOGGER.debug(
                     "Updated state of %s to is_on=%s", self._attr_name, self._is_on
                 )
         elif state.id == self.dim_device_id:
-            new_value = state.current_value
+            new_value = int(state.value)
             if new_value != self.dim_value:
                 self.dim_value = new_value
                 _LOGGER.debug(
@@ -120,30 +117,49 @@ class DivusDimLightEntity(DivusLightEntity):
                     self.dim_value,
                 )
 
+    def restore_state(self, last_state: State) -> None:
+        super().restore_state(last_state)
+        if (brightness := last_state.attributes.get("brightness")) is not None:
+            self.dim_value = math.ceil(brightness_to_value((1, 100), brightness))
+
     @property
     def brightness(self) -> int | None:
-        return value_to_brightness((1, 100), int(self.dim_value))
+        return value_to_brightness((1, 100), self.dim_value)
+
+    def _plan_turn_on(self, **kwargs: Any) -> dict[str, str]:
+        """
+        Return the object writes needed to reach the requested state.
+
+        Writes whose target matches the last known value are left out. The
+        planned writes are independent of each other and are sent together.
+        """
+        values: dict[str, str] = {}
+        if "brightness" in kwargs:
+            dim_value = math.ceil(brightness_to_value((1, 100), kwargs["brightness"]))
+            if not self._is_on or dim_value != self.dim_value:
+                # A brightness value switches the dimmer on by itself, so the
+                # separate switch write (and its ordering) is not needed.
+                values[self.dim_device_id] = str(dim_value)
+        elif not self._is_on:
+            values[self.switch_device_id] = "1"
+        return values
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         if self.switch_device_id is None or self.dim_device_id is None:
             _LOGGER.error("Dim light device %s is missing device IDs", self._attr_name)
             return
 
-        await self.coordinator.api.set_value(self.switch_device_id, "1")
-        if "brightness" in kwargs:
-            value_in_range = math.ceil(
-                brightness_to_value((1, 100), kwargs["brightness"])
-            )
-            await self.coordinator.api.set_value(
-                self.dim_device_id, str(value_in_range)
-            )
-            _LOGGER.debug(
-                "Tured on and set brightness of %s to %s",
-                self._attr_name,
-                kwargs["brightness"],
-            )
-        else:
-            _LOGGER.debug("Turned on light device: %s", self._attr_name)
+        values = self._plan_turn_on(**kwargs)
+        if not values:
+            _LOGGER.debug("Light %s already in requested state", self._attr_name)
+            return
+
+        if await self._async_set_values(values):
+            # Queued writes are shown once the replay is confirmed by a poll
+            self._apply_written(values)
+            self._is_on = True
+            self.async_write_ha_state()
+        _LOGGER.debug("Turned on light device %s with %s", self._attr_name, values)
 
     async def async_turn_off(self) -> None:
         if self.switch_device_id is None:
@@ -151,7 +167,7 @@ class DivusDimLightEntity(DivusLightEntity):
                 "Dim light device %s is missing switch device ID", self._attr_name
             )
             return
-        await self.coordinator.api.set_value(self.switch_device_id, "0")
+        await self._async_set_values({self.switch_device_id: "0"})
         _LOGGER.debug("Turned off light device: %s", self._attr_name)
 
 
@@ -170,7 +186,7 @@ class DivusSwitchLightEntity(DivusLightEntity):
         self._attr_color_mode = ColorMode.ONOFF
 
     def update_state(self, state: DeviceStateDto) -> None:
-        new_is_on = state.current_value == "1"
+        new_is_on = state.value == 1
         if state.id == self.device.id and new_is_on != self._is_on:
             self._is_on = new_is_on
             _LOGGER.debug(
@@ -185,7 +201,7 @@ class DivusColorTempLightEntity(DivusDimLightEntity):
 
     @property
     def color_temp(self) -> int | None:
-        return int(self.color_temp_value) if self.color_temp_value else None
+        return self.color_temp_value
 
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
         super().__init__(coordinator, device)
@@ -201,10 +217,10 @@ class DivusColorTempLightEntity(DivusDimLightEntity):
             if current_color_temp_value_device
             else ""
         )
-        self.color_temp_value = (
-            current_color_temp_value_device["CURRENT_VALUE"]
+        self.color_temp_value: int = (
+            int(current_color_temp_value_device["CURRENT_VALUE"])
             if current_color_temp_value_device
-            else "0"
+            else 0
         )
 
         self.update_device_ids = {
@@ -218,28 +234,30 @@ class DivusColorTempLightEntity(DivusDimLightEntity):
             self.update_device_ids,
         )
 
-    async def async_turn_on(self, **kwargs: Any) -> None:
-        await super().async_turn_on(**kwargs)
-        if self.color_temp_device_id is None:
+    def _plan_turn_on(self, **kwargs: Any) -> dict[str, str]:
+        values = super()._plan_turn_on(**kwargs)
+        if not self.color_temp_device_id:
             _LOGGER.error(
                 "Color temp light device %s is missing color temp device ID",
                 self._attr_name,
             )
-            return
+            return values
         if "color_temp_kelvin" in kwargs:
-            await self.coordinator.api.set_value(
-                self.color_temp_device_id, str(kwargs["color_temp_kelvin"])
-            )
-            _LOGGER.debug(
-                "Set color temp of %s to %s",
-                self._attr_name,
-                kwargs["color_temp_kelvin"],
-            )
+            color_temp = int(kwargs["color_temp_kelvin"])
+            if color_temp != self.color_temp_value:
+                values[self.color_temp_device_id] = str(color_temp)
+        return values
+
+    def restore_state(self, last_state: State) -> None:
+        super().restore_state(last_state)
+        color_temp = last_state.attributes.get("color_temp_kelvin")
+        if color_temp is not None:
+            self.color_temp_value = int(color_temp)
 
     def update_state(self, state: DeviceStateDto) -> None:
         super().update_state(state)
         if state.id == self.color_temp_device_id:
-            new_value = state.current_value
+            new_value = int(state.value)
             if new_value != self.color_temp_value:
                 self.color_temp_value = new_value
                 _LOGGER.debug(
@@ -0,0 +1,77 @@
+import time
+from collections.abc import Callable
+
+
+class CoverTravelModel:
+    """
+    Estimate the position of a moving shutter from its travel times.
+
+    ``open_time`` and ``close_time`` are the seconds a shutter needs to
+    travel the full way up and down. Positions follow Home Assistant's
+    convention: 0 is closed and 100 is fully open. The estimate assumes
+    constant speed and is rebased with :meth:`sync` whenever the controller
+    reports a real position.
+    """
+
+    def __init__(
+        self,
+        open_time: float,
+        close_time: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.open_time = open_time
+        self.close_time = close_time
+        self._clock = clock
+
+        self._start_position = 0.0
+        self._start_time = 0.0
+        self._direction = 0
+        self._target = 0.0
+
+    @property
+    def direction(self) -> int:
+        """Return 1 while opening, -1 while closing and 0 when idle."""
+        if self._direction and self._position(self._clock()) == self._target:
+            self._start_position = self._target
+            self._direction = 0
+        return self._direction
+
+    def start(
+        self, position: float, direction: int, target: float | None = None
+    ) -> None:
+        """Start travelling from ``position`` up (1) or down (-1) to ``target``."""
+        end = 100.0 if direction > 0 else 0.0
+        self._start_position = position
+        self._start_time = self._clock()
+        self._direction = direction
+        self._target = end if target is None else target
+
+    def stop(self) -> float:
+        """Stop where the shutter is estimated to be and return that position."""
+        position = self.position()
+        self._start_position = position
+        self._direction = 0
+        return position
+
+    def sync(self, position: float) -> None:
+        """Rebase the estimate on a position reported by the controller."""
+        self._start_position = position
+        self._start_time = self._clock()
+
+    def position(self) -> float:
+        """Return the estimated position right now."""
+        return self._position(self._clock())
+
+    def _position(self, now: float) -> float:
+        if not self._direction:
+            return self._start_position
+        travel_time = self.open_time if self._direction > 0 else self.close_time
+        if travel_time <= 0:
+            return self._target
+        position = (
+            self._start_position
+            + self._direction * (now - self._start_time) / travel_time * 100
+        )
+        if self._direction > 0:
+            return min(position, self._target)
+        return max(position, self._target)
@@ -0,0 +1,139 @@
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Collection, Iterable
+from typing import Any
+
+from custom_components.divus_dplus.dtos import DeviceStateDto
+
+_LOGGER = logging.getLogger(__name__)
+
+# Queries after which a search that got no answer at all gives up: all
+# objects and both halves of the first split
+_REFUSED_SEARCH_QUERIES = 3
+
+
+async def async_find_rejected(
+    device_ids: list[str],
+    query: Callable[[list[str]], Awaitable[list[DeviceStateDto]]],
+    *,
+    answered: bool,
+    keep_going: Callable[[], bool],
+) -> list[str] | None:
+    """
+    Bisect the objects down to those the controller will not answer for.
+
+    ``query`` returns the states of the objects, empty if the controller
+    refused the query. ``answered`` tells whether the controller returned any
+    state in the query that raised the suspicion. If it also refuses both
+    halves of the first split, the controller is taken to be at fault rather
+    than the IDs and None is returned; bad IDs in both halves of a query that
+    got no answer at all look the same. The search also gives up with None as
+    soon as ``keep_going`` returns False.
+    """
+    bad: list[str] = []
+    # Breadth first, so queries two and three are the halves of the first split
+    groups = deque([device_ids])
+    queries = 0
+    while groups:
+        if not keep_going():
+            return None
+        ids = groups.popleft()
+        returned = {state.id for state in await query(ids)}
+        queries += 1
+        if returned:
+            answered = True
+            # The controller silently leaves out IDs it does not know
+            bad.extend(x for x in ids if x not in returned)
+        elif not answered and queries == _REFUSED_SEARCH_QUERIES:
+            return None
+        elif len(ids) == 1:
+            bad.extend(ids)
+        else:
+            half = len(ids) // 2
+            groups.extend((ids[:half], ids[half:]))
+    return bad if answered else None
+
+
+class DivusQuarantine:
+    """
+    Object IDs kept out of the batch poll because the controller rejects them.
+
+    One deleted or malformed ID can make the controller answer a whole state
+    query with nothing (or an error), taking every other object in the query
+    down with it. Quarantined IDs are polled on their own instead, first
+    after ``reprobe_interval`` seconds and then at intervals that double with
+    every failed probe (capped at ``max_reprobe_interval``). An ID is
+    released as soon as a probe returns its state.
+    """
+
+    def __init__(
+        self,
+        reprobe_interval: float = 300.0,
+        max_reprobe_interval: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._reprobe_interval = reprobe_interval
+        self._max_reprobe_interval = max_reprobe_interval
+        self._clock = clock
+        # Object ID -> (quarantined since as a Unix timestamp, failed probes,
+        # next probe on the clock)
+        self._entries: dict[str, tuple[float, int, float]] = {}
+
+    def __contains__(self, device_id: object) -> bool:
+        """Return True if the object is quarantined."""
+        return device_id in self._entries
+
+    def add(self, device_ids: Iterable[str]) -> list[str]:
+        """Quarantine the objects and return those that were not already."""
+        added = [x for x in device_ids if x not in self._entries]
+        next_probe = self._clock() + self._reprobe_interval
+        for device_id in added:
+            self._entries[device_id] = (time.time(), 0, next_probe)
+        if added:
+            _LOGGER.warning(
+                "DIVUS D+ controller rejects objects %s, polling them separately",
+                ", ".join(added),
+            )
+        return added
+
+    def due(self) -> list[str]:
+        """Return the quarantined objects whose next probe is due."""
+        now = self._clock()
+        return [
+            device_id
+            for device_id, (_, _, next_probe) in self._entries.items()
+            if next_probe <= now
+        ]
+
+    def release(self, device_id: str) -> None:
+        """Return an object that answered a probe to the batch poll."""
+        if self._entries.pop(device_id, None) is not None:
+            _LOGGER.info(
+                "DIVUS D+ object %s answers again, polling it normally", device_id
+            )
+
+    def retain(self, device_ids: Collection[str]) -> None:
+        """Forget quarantined objects that are no longer polled at all."""
+        for device_id in [x for x in self._entries if x not in device_ids]:
+            del self._entries[device_id]
+
+    def record_failed_probe(self, device_id: str) -> None:
+        if device_id not in self._entries:
+            return
+        since, failures, _ = self._entries[device_id]
+        failures += 1
+        interval = min(self._reprobe_interval * 2**failures, self._max_reprobe_interval)
+        self._entries[device_id] = (since, failures, self._clock() + interval)
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """Return the quarantined objects for diagnostics."""
+        now = self._clock()
+        return {
+            device_id: {
+                "since": since,
+                "failed_probes": failures,
+                "next_probe_in": round(max(next_probe - now, 0.0), 1),
+            }
+            for device_id, (since, failures, next_probe) in self._entries.items()
+        }
@@ -0,0 +1,47 @@
+import logging
+from typing import Any
+
+from homeassistant.components.scene import Scene
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from custom_components.divus_dplus.coordinator import DivusCoordinator
+from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    _LOGGER.info("Setting up DIVUS D+ scenes for entry %s", entry.entry_id)
+
+    async_add_divus_entities(hass, entry, async_add_entities, DivusSceneEntity)
+
+
+class DivusSceneEntity(DivusEntity, Scene):
+    """
+    Scenario stored on the D+ controller.
+
+    Activating it is a single write; the controller then switches all objects
+    of the scenario itself, which is much faster than one write per object.
+    """
+
+    def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
+        super().__init__(coordinator, device)
+
+        self._attr_unique_id = coordinator.entry.entry_id + "_" + device.id
+        self._attr_name = device.json["NAME"]
+        # A scenario has no state worth polling
+        self.update_device_ids = set()
+        _LOGGER.debug("Adding scene device: %s", self._attr_name)
+
+    async def async_activate(self, **kwargs: Any) -> None:  # noqa: ARG002
+        """Run the scenario on the controller."""
+        await self._async_set_values({self.device.id: "1"})
+        _LOGGER.debug("Activated scene: %s", self._attr_name)
+
+    def update_state(self, state: DeviceStateDto) -> None:
+        pass
@@ -0,0 +1,106 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestPriority(IntEnum):
+    """Request classes, most urgent first."""
+
+    WRITE = 0
+    REFRESH = 1
+    POLL = 2
+    DISCOVERY = 3
+
+
+class DivusPollSkippedError(Exception):
+    """Raised when a routine poll yields to a user command in flight."""
+
+
+class DivusRequestScheduler:
+    """
+    Order requests to the D+ controller by priority.
+
+    At most ``max_in_flight`` requests run at once. Interactive writes may
+    use ``reserved_write_slots`` more on top, so a light toggle never queues
+    behind a poll or a discovery walk, however low ``max_in_flight`` is set.
+    Routine polls are skipped outright while a write is in flight, the next
+    tick picks up the result.
+    """
+
+    def __init__(self, max_in_flight: int = 8, reserved_write_slots: int = 1) -> None:
+        self.max_in_flight = max_in_flight
+        self._reserved_write_slots = reserved_write_slots
+        self._in_flight = 0
+        self._writes = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+
+    @property
+    def writes_in_flight(self) -> int:
+        """Return the number of writes running or queued."""
+        return self._writes
+
+    @asynccontextmanager
+    async def slot(self, priority: RequestPriority) -> AsyncIterator[None]:
+        """Hold a request slot for the duration of the block."""
+        if priority == RequestPriority.POLL and self._writes:
+            msg = "Poll skipped, write in flight"
+            raise DivusPollSkippedError(msg)
+
+        if priority == RequestPriority.WRITE:
+            self._writes += 1
+        try:
+            await self._acquire(priority)
+            try:
+                yield
+            finally:
+                self._release()
+        finally:
+            if priority == RequestPriority.WRITE:
+                self._writes -= 1
+
+    def _can_run(self, priority: int) -> bool:
+        if priority == RequestPriority.WRITE:
+            return self._in_flight < self.max_in_flight + self._reserved_write_slots
+        return self._in_flight < self.max_in_flight
+
+    async def _acquire(self, priority: RequestPriority) -> None:
+        queued_ahead = self._waiters and self._waiters[0][0] <= priority
+        if not queued_ahead and self._can_run(priority):
+            self._in_flight += 1
+            return
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        _LOGGER.debug(
+            "Queued %s request behind %d others", priority.name, len(self._waiters)
+        )
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was granted just before we got cancelled
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_run(priority):
+                return
+            heapq.heappop(self._waiters)
+            self._in_flight += 1
+            future.set_result(None)
@@ -6,14 +6,12 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from custom_components.divus_dplus.const import DOMAIN
 from custom_components.divus_dplus.coordinator import DivusCoordinator
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
-from custom_components.divus_dplus.entity import DivusEntity
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -23,16 +21,13 @@ async def async_setup_entry(
 ) -> None:
     _LOGGER.info("Setting up DIVUS D+ sensors for entry %s", entry.entry_id)
 
-    devices = hass.data[DOMAIN][entry.entry_id]["coordinator"].devices
-    devices = [dev for dev in devices if isinstance(dev, DivusSensorEntity)]
-    async_add_entities(devices)
+    async_add_divus_entities(hass, entry, async_add_entities, DivusSensorEntity)
 
 
-class DivusSensorEntity(SensorEntity, CoordinatorEntity, DivusEntity):
+class DivusSensorEntity(DivusEntity, SensorEntity):
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
 
-        DivusEntity.__init__(self, device)
         self._attr_name = device.json["NAME"]
 
         current_temperature_device = next(
@@ -49,6 +44,8 @@ class DivusSensorEntity(SensorEntity, CoordinatorEntity, DivusEntity):
             if current_temperature_device
             else 0
         )
+        self._temperature_filter = coordinator.temperature_filter()
+        self._temperature_filter.accept(self._attr_native_value)
 
         self.update_device_ids = {self.current_temperature_device_id}
         _LOGGER.debug("Adding sensor device: %s", self._attr_name)
@@ -69,6 +66,23 @@ class DivusSensorEntity(SensorEntity, CoordinatorEntity, DivusEntity):
     def suggested_display_precision(self) -> int | None:
         return 2
 
+    def restore_state(self, last_state: State) -> None:
+        try:
+            self._attr_native_value = float(last_state.state)
+        except ValueError:
+            return
+        self._temperature_filter.reset()
+
+    def _changed_states(self) -> list[DeviceStateDto]:
+        return self._reoffer_held_back(
+            super()._changed_states(),
+            self.current_temperature_device_id,
+            self._attr_native_value,
+            self._temperature_filter,
+        )
+
     def update_state(self, state: DeviceStateDto) -> None:
         if state.id == self.current_temperature_device_id:
-            self._attr_native_value = float(state.current_value)
+            value = float(state.value)
+            if self._temperature_filter.accept(value):
+                self._attr_native_value = value
@@ -0,0 +1,76 @@
+import logging
+
+import voluptuous as vol
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+
+from custom_components.divus_dplus.api import DivusDplusApi
+from custom_components.divus_dplus.const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_SET_VALUES = "set_values"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_VALUES = "values"
+
+SET_VALUES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_VALUES): vol.Schema({cv.string: cv.string}),
+    }
+)
+
+
+def _get_api(hass: HomeAssistant, call: ServiceCall) -> DivusDplusApi:
+    """Return the API of the targeted (or only) loaded config entry."""
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is not None:
+        entries = [entry for entry in entries if entry.entry_id == entry_id]
+    if len(entries) != 1:
+        msg = (
+            f"No loaded DIVUS D+ entry with ID '{entry_id}'"
+            if entry_id is not None
+            else "Specify config_entry_id when several DIVUS D+ entries are set up"
+        )
+        raise ServiceValidationError(msg)
+    return hass.data[DOMAIN][entries[0].entry_id]["api"]
+
+
+async def _async_set_values(call: ServiceCall) -> ServiceResponse:
+    api = _get_api(call.hass, call)
+    results = await api.set_values(call.data[ATTR_VALUES])
+    _LOGGER.debug(
+        "Bulk write of %d values, %d failed",
+        len(results),
+        sum(not result.success for result in results.values()),
+    )
+    return {
+        "results": {
+            device_id: {"success": result.success, "error": result.error}
+            for device_id, result in results.items()
+        }
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration-wide services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_VALUES,
+        _async_set_values,
+        schema=SET_VALUES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
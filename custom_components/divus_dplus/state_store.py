@@ -0,0 +1,63 @@
+from collections.abc import Iterable
+
+from custom_components.divus_dplus.dtos import DeviceStateDto
+
+
+class DivusStateStore:
+    """
+    Last known value of every polled object, shared by all entities.
+
+    A state is only replaced when its raw value or availability changes, so
+    its typed value is decoded once per change. Each change bumps the
+    store's ``version`` and stamps it on the new state; an entity that
+    remembers the version it last looked at can ask which of its objects
+    changed since.
+    """
+
+    def __init__(self) -> None:
+        self._states: dict[str, DeviceStateDto] = {}
+        self.version = 0
+
+    def get(self, device_id: str) -> DeviceStateDto | None:
+        """Return the last known state of an object, if any."""
+        return self._states.get(device_id)
+
+    def update(
+        self, states: Iterable[DeviceStateDto]
+    ) -> list[tuple[DeviceStateDto | None, DeviceStateDto]]:
+        """Store new states and return (old, new) pairs of those that changed."""
+        changes: list[tuple[DeviceStateDto | None, DeviceStateDto]] = []
+        for state in states:
+            old = self._states.get(state.id)
+            if (
+                old is not None
+                and old.current_value == state.current_value
+                and old.available == state.available
+            ):
+                continue
+            self.version += 1
+            state.version = self.version
+            self._states[state.id] = state
+            changes.append((old, state))
+        return changes
+
+    def mark_missing(self, device_ids: Iterable[str]) -> list[DeviceStateDto]:
+        """Return unavailable states for these objects, keeping any last value."""
+        return [
+            DeviceStateDto(
+                device_id, old.current_value if old else None, available=False
+            )
+            for device_id in device_ids
+            if (old := self._states.get(device_id)) is None or old.available
+        ]
+
+    def changed_since(
+        self, device_ids: Iterable[str], version: int
+    ) -> list[DeviceStateDto]:
+        """Return the states of the given objects that changed after version."""
+        return [
+            state
+            for device_id in device_ids
+            if (state := self._states.get(device_id)) is not None
+            and state.version > version
+        ]
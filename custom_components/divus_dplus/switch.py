@@ -2,15 +2,13 @@ import logging
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import STATE_ON
+from homeassistant.core import HomeAssistant, State
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from custom_components.divus_dplus.coordinator import DivusCoordinator
 from custom_components.divus_dplus.dtos import DeviceDto, DeviceStateDto
-from custom_components.divus_dplus.entity import DivusEntity
-
-from .const import DOMAIN
+from custom_components.divus_dplus.entity import DivusEntity, async_add_divus_entities
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,19 +18,15 @@ async def async_setup_entry(
 ) -> None:
     _LOGGER.info("Setting up DIVUS D+ switches for entry %s", entry.entry_id)
 
-    devices = hass.data[DOMAIN][entry.entry_id]["coordinator"].devices
-    devices = [dev for dev in devices if isinstance(dev, DivusSwitchEntity)]
-    async_add_entities(devices)
+    async_add_divus_entities(hass, entry, async_add_entities, DivusSwitchEntity)
 
 
-class DivusSwitchEntity(SwitchEntity, CoordinatorEntity, DivusEntity):
+class DivusSwitchEntity(DivusEntity, SwitchEntity):
     _is_on: bool = False
 
     def __init__(self, coordinator: DivusCoordinator, device: DeviceDto) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, device)
 
-        DivusEntity.__init__(self, device)
-        self.coordinator = coordinator
         self._attr_unique_id = coordinator.entry.entry_id + "_" + device.id
         self._attr_name = device.json["NAME"]
         self._is_on = device.json["CURRENT_VALUE"] == "1"
@@ -45,13 +39,16 @@ class DivusSwitchEntity(SwitchEntity, CoordinatorEntity, DivusEntity):
         return self._is_on
 
     async def async_turn_on(self) -> None:
-        await self.coordinator.api.set_value(self.device.id, "1")
+        await self._async_set_values({self.device.id: "1"})
 
     async def async_turn_off(self) -> None:
-        await self.coordinator.api.set_value(self.device.id, "0")
+        await self._async_set_values({self.device.id: "0"})
+
+    def restore_state(self, last_state: State) -> None:
+        self._is_on = last_state.state == STATE_ON
 
     def update_state(self, state: DeviceStateDto) -> None:
-        new_is_on = state.current_value == "1"
+        new_is_on = state.value == 1
         if state.id == self.device.id and new_is_on != self._is_on:
             self._is_on = new_is_on
             _LOGGER.debug(
@@ -0,0 +1,190 @@
+import json
+import logging
+import queue
+import random
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueListener, RotatingFileHandler
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_FILE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_FILE_BACKUPS = 3
+
+_current_span: ContextVar["DivusSpan | None"] = ContextVar(
+    "divus_current_span", default=None
+)
+
+
+class DivusSpan:
+    """
+    Timing of one operation, with named points and nested operations.
+
+    Points are milliseconds since the span started. An unsampled span
+    records nothing, so callers never have to check whether tracing is on.
+    """
+
+    def __init__(
+        self,
+        tracer: "DivusTracer | None",
+        name: str,
+        attributes: dict[str, Any],
+        parent: "DivusSpan | None" = None,
+    ) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.sampled = tracer is not None
+        self.started = time.perf_counter()
+        self.children: list[DivusSpan] = []
+        self._tracer = tracer
+        self._parent = parent
+        self._wall_start = time.time()
+        self._events: dict[str, float] = {}
+        self._duration: float | None = None
+        self._error: str | None = None
+        if parent is not None:
+            parent.children.append(self)
+
+    def event(self, name: str) -> None:
+        """Record that the named point was reached now."""
+        if self.sampled and name not in self._events:
+            self._events[name] = self._elapsed_ms()
+
+    @contextmanager
+    def activate(self) -> Iterator["DivusSpan"]:
+        """Make this the current span, so nested operations attach to it."""
+        token = _current_span.set(self)
+        try:
+            yield self
+        finally:
+            _current_span.reset(token)
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """End the span; a root span is then written out with its children."""
+        if not self.sampled or self._duration is not None:
+            return
+        self._duration = self._elapsed_ms()
+        if error is not None:
+            self._error = str(error) or type(error).__name__
+        if self._parent is None and self._tracer is not None:
+            self._tracer.emit(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        span: dict[str, Any] = {"name": self.name, **self.attributes}
+        if self._parent is None:
+            span["start"] = round(self._wall_start, 3)
+        else:
+            span["offset_ms"] = round((self.started - self._parent.started) * 1000, 1)
+        span["duration_ms"] = self._duration
+        if self._events:
+            span["events"] = self._events
+        if self._error is not None:
+            span["error"] = self._error
+        if self.children:
+            span["children"] = [child.to_dict() for child in self.children]
+        return span
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+
+class DivusTracer:
+    """
+    Break individual API operations down into timed steps.
+
+    ``sample_rate`` is the share of top-level operations (such as one poll)
+    that are traced; nested operations follow their parent's decision.
+    Traced operations are written as one JSON line each to a rotating file
+    at ``path``, or to the debug log without one. Use :meth:`trace_config`
+    on the aiohttp session to add connection and transfer timings.
+    """
+
+    def __init__(self, sample_rate: float = 0.0, path: str | None = None) -> None:
+        self.sample_rate = sample_rate
+        self._records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        self._listener: QueueListener | None = None
+        if sample_rate and path:
+            handler = RotatingFileHandler(
+                path,
+                maxBytes=TRACE_FILE_MAX_BYTES,
+                backupCount=TRACE_FILE_BACKUPS,
+                encoding="utf-8",
+                delay=True,
+            )
+            # Writing happens on the listener's thread, never the event loop
+            self._listener = QueueListener(self._records, handler)
+            self._listener.start()
+
+    def start(self, name: str, **attributes: Any) -> DivusSpan:
+        """Start a span nested in the current one, or a new sampled root."""
+        parent = _current_span.get()
+        sampled = (
+            parent.sampled
+            if parent is not None
+            else bool(self.sample_rate) and random.random() < self.sample_rate  # noqa: S311
+        )
+        if not sampled:
+            return DivusSpan(None, name, attributes)
+        return DivusSpan(self, name, attributes, parent)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[DivusSpan]:
+        """Trace the block as a span that is current while it runs."""
+        span = self.start(name, **attributes)
+        try:
+            with span.activate():
+                yield span
+        except BaseException as err:
+            span.finish(err)
+            raise
+        span.finish()
+
+    def emit(self, span: DivusSpan) -> None:
+        line = json.dumps(span.to_dict(), separators=(",", ":"))
+        if self._listener is not None:
+            self._records.put(logging.makeLogRecord({"msg": line}))
+        else:
+            _LOGGER.debug("Trace %s", line)
+
+    def close(self) -> None:
+        """Flush and close the trace file."""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return hooks that mark connection and transfer steps on the span."""
+        trace_config = aiohttp.TraceConfig()
+        marks = (
+            (trace_config.on_connection_queued_start, "pool_wait"),
+            (trace_config.on_connection_queued_end, "pool_acquired"),
+            (trace_config.on_dns_resolvehost_end, "dns"),
+            (trace_config.on_connection_create_start, "connect_start"),
+            (trace_config.on_connection_create_end, "connected"),
+            (trace_config.on_connection_reuseconn, "connection_reused"),
+            (trace_config.on_request_headers_sent, "headers_sent"),
+            (trace_config.on_request_chunk_sent, "sent"),
+            (trace_config.on_request_end, "first_byte"),
+        )
+        for signal, name in marks:
+            signal.append(_mark(name))
+        return trace_config
+
+
+def _mark(name: str) -> Any:
+    async def _on_signal(
+        _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: object
+    ) -> None:
+        span = _current_span.get()
+        if span is not None:
+            span.event(name)
+
+    return _on_signal
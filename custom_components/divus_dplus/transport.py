@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Protocol
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACTED = "REDACTED"
+
+_SESSION_FORM_FIELDS = {"sessionid", "sessionId"}
+_REDACTED_FORM_FIELDS = {"username", "password", *_SESSION_FORM_FIELDS}
+_SESSION_ID_XML = re.compile(r"<sessionid>(.*?)</sessionid>", re.DOTALL)
+FORM_CONTENT_TYPE = "application/x-www-form-urlencoded"
+
+
+class DivusTransport(Protocol):
+    """Sends a single HTTP POST to the D+ controller and returns the body."""
+
+    async def post(self, url: str, data: str, content_type: str) -> str: ...
+
+    async def close(self) -> None: ...
+
+
+class DivusReplayMissError(LookupError):
+    """Raised when a replayed session has no capture for a request."""
+
+
+def _endpoint(url: str) -> str:
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+def redact(data: str, content_type: str) -> str:
+    """Strip credentials and session IDs from a request or response body."""
+    if content_type == FORM_CONTENT_TYPE:
+        return urlencode(
+            [
+                (key, REDACTED if key in _REDACTED_FORM_FIELDS else value)
+                for key, value in parse_qsl(data, keep_blank_values=True)
+            ]
+        )
+    return _SESSION_ID_XML.sub(f"<sessionid>{REDACTED}</sessionid>", data)
+
+
+def get_session_id(data: str, content_type: str) -> str | None:
+    """Return the session ID a request body carries, if any."""
+    if content_type == FORM_CONTENT_TYPE:
+        return next(
+            (
+                value
+                for key, value in parse_qsl(data, keep_blank_values=True)
+                if key in _SESSION_FORM_FIELDS
+            ),
+            None,
+        )
+    match = _SESSION_ID_XML.search(data)
+    return match.group(1) if match else None
+
+
+def replace_session_id(data: str, content_type: str, session_id: str) -> str:
+    """Return a request body with its session ID swapped for another one."""
+    if content_type == FORM_CONTENT_TYPE:
+        return urlencode(
+            [
+                (key, session_id if key in _SESSION_FORM_FIELDS else value)
+                for key, value in parse_qsl(data, keep_blank_values=True)
+            ]
+        )
+    return _SESSION_ID_XML.sub(f"<sessionid>{session_id}</sessionid>", data)
+
+
+class AiohttpTransport:
+    def __init__(
+        self, session: aiohttp.ClientSession, *, close_session: bool = True
+    ) -> None:
+        self._session = session
+        self._close_session = close_session
+
+    async def post(self, url: str, data: str, content_type: str) -> str:
+        async with self._session.post(
+            url, data=data, headers={"Content-Type": content_type}
+        ) as r:
+            return await r.text()
+
+    async def close(self) -> None:
+        # A session shared with other config entries is closed by its owner
+        if self._close_session:
+            await self._session.close()
+
+
+class BridgeTransport:
+    """
+    Send requests through a bridge process instead of to the controller.
+
+    The bridge (``python -m custom_components.divus_dplus bridge``) owns the
+    only session and poll loop against the controller and answers state
+    queries from its own store, so several Home Assistant instances cost the
+    controller no more than one.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        bridge_url: str,
+        *,
+        close_session: bool = True,
+    ) -> None:
+        self._session = session
+        self._bridge_url = bridge_url.rstrip("/")
+        self._close_session = close_session
+
+    async def post(self, url: str, data: str, content_type: str) -> str:
+        async with self._session.post(
+            f"{self._bridge_url}/request",
+            json={
+                "path": urlsplit(url).path,
+                "data": data,
+                "content_type": content_type,
+            },
+        ) as r:
+            r.raise_for_status()
+            return await r.text()
+
+    async def close(self) -> None:
+        if self._close_session:
+            await self._session.close()
+
+
+class RecordingTransport:
+    """
+    Capture redacted request/response pairs with timings to a JSON Lines file.
+
+    Every call to ``surrounding.php``, ``api.php``, ``user_login.php`` and
+    ``dpadws`` is appended as one line, so a capture from a real
+    installation can later be fed back through :class:`ReplayTransport`.
+    """
+
+    def __init__(self, inner: DivusTransport, path: str | Path) -> None:
+        self._inner = inner
+        self._path = Path(path)
+        self._started = time.monotonic()
+
+    async def post(self, url: str, data: str, content_type: str) -> str:
+        started = time.monotonic()
+        error: str | None = None
+        response = ""
+        try:
+            response = await self._inner.post(url, data, content_type)
+        except Exception as err:
+            error = repr(err)
+            raise
+        finally:
+            capture = {
+                "t": round(started - self._started, 4),
+                "duration": round(time.monotonic() - started, 4),
+                "endpoint": _endpoint(url),
+                "content_type": content_type,
+                "request": redact(data, content_type),
+                "response": redact(response, "text/xml"),
+                "error": error,
+            }
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._append, json.dumps(capture)
+            )
+        return response
+
+    def _append(self, line: str) -> None:
+        with self._path.open("a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+    async def close(self) -> None:
+        await self._inner.close()
+
+
+class ReplayTransport:
+    """
+    Answer requests from a capture written by :class:`RecordingTransport`.
+
+    Requests are matched on endpoint and redacted body; repeated requests
+    (such as polls) cycle through their recorded responses. Each response
+    is delayed by its recorded duration divided by ``speed``, a speed of 0
+    replays without any delay.
+    """
+
+    def __init__(self, path: str | Path, speed: float = 1.0) -> None:
+        self._speed = speed
+        self._captures: dict[tuple[str, str], deque[dict]] = defaultdict(deque)
+        self._by_endpoint: dict[str, deque[dict]] = defaultdict(deque)
+        with Path(path).open(encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                capture = json.loads(line)
+                if capture.get("error"):
+                    continue
+                key = (capture["endpoint"], capture["request"])
+                self._captures[key].append(capture)
+                self._by_endpoint[capture["endpoint"]].append(capture)
+        _LOGGER.debug(
+            "Loaded %d captured requests", sum(map(len, self._captures.values()))
+        )
+
+    async def post(self, url: str, data: str, content_type: str) -> str:
+        endpoint = _endpoint(url)
+        queue = self._captures.get((endpoint, redact(data, content_type)))
+        if not queue:
+            # Fall back to any capture of the same endpoint, e.g. a poll for
+            # a slightly different ID set than the one recorded.
+            queue = self._by_endpoint.get(endpoint)
+        if not queue:
+            msg = f"No capture for {endpoint}"
+            raise DivusReplayMissError(msg)
+
+        capture = queue[0]
+        queue.rotate(-1)
+        if self._speed > 0:
+            await asyncio.sleep(capture["duration"] / self._speed)
+        return capture["response"]
+
+    async def close(self) -> None:
+        pass
@@ -3,14 +3,53 @@ import sys
 from unittest.mock import MagicMock
 from pathlib import Path
 
+import pytest
+
 # Mock homeassistant before any imports
 sys.modules['homeassistant'] = MagicMock()
 sys.modules['homeassistant.config_entries'] = MagicMock()
 sys.modules['homeassistant.core'] = MagicMock()
 sys.modules['homeassistant.helpers'] = MagicMock()
 sys.modules['homeassistant.helpers.update_coordinator'] = MagicMock()
+sys.modules['homeassistant.components'] = MagicMock()
+sys.modules['homeassistant.components.climate'] = MagicMock()
+sys.modules['homeassistant.components.climate.const'] = MagicMock()
+sys.modules['homeassistant.components.cover'] = MagicMock()
+sys.modules['homeassistant.components.diagnostics'] = MagicMock()
+sys.modules['homeassistant.components.light'] = MagicMock()
+sys.modules['homeassistant.components.light.const'] = MagicMock()
+sys.modules['homeassistant.components.scene'] = MagicMock()
+sys.modules['homeassistant.components.sensor'] = MagicMock()
+sys.modules['homeassistant.components.switch'] = MagicMock()
+sys.modules['homeassistant.const'] = MagicMock()
+sys.modules['homeassistant.exceptions'] = MagicMock()
+sys.modules['homeassistant.helpers.device_registry'] = MagicMock()
+sys.modules['homeassistant.helpers.dispatcher'] = MagicMock()
+sys.modules['homeassistant.helpers.entity_platform'] = MagicMock()
+sys.modules['homeassistant.helpers.event'] = MagicMock()
+sys.modules['homeassistant.helpers.restore_state'] = MagicMock()
+sys.modules['homeassistant.helpers.storage'] = MagicMock()
+sys.modules['homeassistant.helpers.typing'] = MagicMock()
+sys.modules['homeassistant.util'] = MagicMock()
+sys.modules['homeassistant.util.color'] = MagicMock()
 
 # Add custom_components to path
 custom_components_path = str(Path(__file__).parent.parent / "custom_components")
 if custom_components_path not in sys.path:
     sys.path.insert(0, custom_components_path)
+
+
+class FakeClock:
+    """Monotonic clock the tests advance by hand."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    """Return a fake clock starting at zero, for the ``clock`` arguments."""
+    return FakeClock()
@@ -0,0 +1,129 @@
+"""Tests for the bridge poll loop."""
+
+import time
+
+import aiohttp
+import pytest
+
+from custom_components.divus_dplus.api import DivusDplusApi
+
+from custom_components.divus_dplus.bridge import SUBSCRIPTION_TIMEOUT, DivusBridge
+from custom_components.divus_dplus.dtos import DeviceStateDto
+from custom_components.divus_dplus.scheduler import DivusPollSkippedError
+from custom_components.divus_dplus.transport import get_session_id
+
+
+class FakeApi:
+    """Answers state queries with canned states or raises the given error."""
+
+    def __init__(self, states=None, error=None) -> None:
+        self.states = states or []
+        self.error = error
+        self.queries: list[list[str]] = []
+
+    async def get_states(self, device_ids, priority=None):
+        self.queries.append(device_ids)
+        if self.error is not None:
+            raise self.error
+        return [state for state in self.states if state.id in device_ids]
+
+
+class TestDivusBridgePoll:
+    """Test cases for DivusBridge._poll."""
+
+    async def test_poll_stores_states(self):
+        """Polled states are stored for the clients."""
+        bridge = DivusBridge(FakeApi([DeviceStateDto("1", "20.5")]), "user", "secret")
+        bridge._subscriptions.update(dict.fromkeys(["1"], time.monotonic()))
+        await bridge._poll()
+        assert bridge._states.get("1").value == 20.5
+        assert bridge._last_poll is not None
+
+    async def test_missing_objects_are_marked_unavailable(self):
+        """Objects the controller leaves out are reported unavailable."""
+        bridge = DivusBridge(FakeApi([DeviceStateDto("1", "1")]), "user", "secret")
+        bridge._subscriptions.update(dict.fromkeys(["1", "2"], time.monotonic()))
+        await bridge._poll()
+        missing = bridge._states.get("2")
+        assert missing is not None
+        assert not missing.available
+        assert missing.current_value is None
+
+    async def test_skipped_poll_is_not_an_error(self):
+        """A poll that yields to a command returns quietly and keeps the states."""
+        api = FakeApi(error=DivusPollSkippedError("skipped"))
+        bridge = DivusBridge(api, "user", "secret")
+        bridge._subscriptions.update(dict.fromkeys(["1"], time.monotonic()))
+        await bridge._poll()
+        assert api.queries == [["1"]]
+        assert bridge._last_poll is None
+
+    async def test_failed_poll_keeps_the_last_poll_time(self):
+        """A connection error leaves the bridge to report the outage later."""
+        api = FakeApi(error=aiohttp.ClientError("down"))
+        bridge = DivusBridge(api, "user", "secret")
+        bridge._subscriptions.update(dict.fromkeys(["1"], time.monotonic()))
+        await bridge._poll()
+        assert bridge._last_poll is None
+
+    async def test_expired_subscriptions_are_not_polled(self):
+        """Objects no client asked for recently are dropped from the poll."""
+        api = FakeApi([DeviceStateDto("1", "1")])
+        bridge = DivusBridge(api, "user", "secret")
+        bridge._subscriptions.update(dict.fromkeys(["1", "2"], time.monotonic()))
+        bridge._subscriptions["2"] -= SUBSCRIPTION_TIMEOUT + 1
+        await bridge._poll()
+        assert api.queries == [["1"]]
+        assert "2" not in bridge._subscriptions
+
+
+class RestartingBridgeTransport:
+    """Acts like a bridge that only accepts the token of its latest start."""
+
+    def __init__(self) -> None:
+        self.token = "first"
+        # Token handed out at login; differs from token to simulate a bad login
+        self.issued = "first"
+        self.logins = 0
+        self.rejected = 0
+
+    async def post(self, url, data, content_type):
+        if url.endswith("user_login.php"):
+            self.logins += 1
+            return f"<response><sessionid>{self.issued}</sessionid></response>"
+        if get_session_id(data, content_type) != self.token:
+            self.rejected += 1
+            raise aiohttp.ClientResponseError(None, (), status=401)
+        return "<response><payload>Row0: ID, CURRENT_VALUE\nRow1: '1','0'</payload></response>"
+
+    async def close(self) -> None:
+        pass
+
+
+class TestBridgeClientSession:
+    """Test cases for clients of a restarted bridge."""
+
+    async def test_client_logs_in_again_after_a_bridge_restart(self):
+        """A rejected session is replaced instead of failing every request."""
+        transport = RestartingBridgeTransport()
+        api = DivusDplusApi("bridge", "user", "secret", transport=transport)
+        await api.get_states(["1"])
+
+        transport.token = transport.issued = "second"
+        states = await api.get_states(["1"])
+
+        assert [state.id for state in states] == ["1"]
+        assert transport.logins == 2
+        assert transport.rejected == 1
+
+    async def test_session_rejected_after_login_is_not_retried_again(self):
+        """The request is retried only once with a fresh session."""
+        transport = RestartingBridgeTransport()
+        api = DivusDplusApi("bridge", "user", "secret", transport=transport)
+        await api.get_states(["1"])
+
+        transport.token = "second"
+        with pytest.raises(aiohttp.ClientResponseError):
+            await api.get_states(["1"])
+        assert transport.logins == 2
+        assert transport.rejected == 2
@@ -0,0 +1,69 @@
+"""Tests for the polling circuit breaker."""
+
+from custom_components.divus_dplus.circuit_breaker import (
+    CircuitState,
+    DivusCircuitBreaker,
+)
+
+
+def trip(breaker: DivusCircuitBreaker, failures: int = 3) -> None:
+    for _ in range(failures):
+        breaker.record_failure()
+
+
+class TestDivusCircuitBreaker:
+    """Test cases for DivusCircuitBreaker."""
+
+    def test_stays_closed_below_the_threshold(self, clock):
+        """Occasional failures do not stop polling."""
+        breaker = DivusCircuitBreaker(failure_threshold=3, clock=clock)
+        trip(breaker, 2)
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.allow_request()
+        assert breaker.backoff == 0
+
+    def test_opens_after_consecutive_failures(self, clock):
+        """The breaker rejects requests for the backoff once it opens."""
+        breaker = DivusCircuitBreaker(failure_threshold=3, base_backoff=2, clock=clock)
+        trip(breaker)
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow_request()
+        clock.now = 2
+        assert breaker.allow_request()
+        assert breaker.state == CircuitState.HALF_OPEN
+
+    def test_backoff_doubles_up_to_the_cap(self, clock):
+        """Every further failure doubles the backoff until max_backoff."""
+        breaker = DivusCircuitBreaker(
+            failure_threshold=3, base_backoff=2, max_backoff=10, clock=clock
+        )
+        trip(breaker)
+        assert breaker.backoff == 2
+        breaker.record_failure()
+        assert breaker.backoff == 4
+        trip(breaker, 5)
+        assert breaker.backoff == 10
+
+    def test_failed_probe_reopens_with_a_longer_backoff(self, clock):
+        """A half-open probe that fails opens the breaker again."""
+        breaker = DivusCircuitBreaker(failure_threshold=3, base_backoff=2, clock=clock)
+        trip(breaker)
+        clock.now = 2
+        breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        clock.now = 5
+        assert not breaker.allow_request()
+        clock.now = 6
+        assert breaker.allow_request()
+
+    def test_success_closes_and_resets(self, clock):
+        """A successful probe resumes normal polling."""
+        breaker = DivusCircuitBreaker(failure_threshold=3, clock=clock)
+        trip(breaker)
+        clock.now = 10
+        breaker.allow_request()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+        assert breaker.failures == 0
+        assert breaker.backoff == 0
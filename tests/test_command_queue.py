@@ -0,0 +1,150 @@
+"""Tests for the durable outbound command queue."""
+
+import time
+
+import aiohttp
+import pytest
+
+from custom_components.divus_dplus import command_queue
+from custom_components.divus_dplus.command_queue import DivusCommandQueue
+from custom_components.divus_dplus.dtos import WriteResultDto
+
+
+class FakeStore:
+    """Keeps the saved data in memory like HA's Store."""
+
+    def __init__(self, data=None) -> None:
+        self.data = data
+
+    async def async_load(self):
+        return self.data
+
+    async def async_save(self, data) -> None:
+        self.data = data
+
+
+class FakeApi:
+    """Accepts writes while online and records them."""
+
+    def __init__(self) -> None:
+        self.online = True
+        self.writes: list[tuple[str, str]] = []
+
+    async def set_value(self, device_id, value):
+        if not self.online:
+            msg = "unreachable"
+            raise aiohttp.ClientError(msg)
+        self.writes.append((device_id, value))
+        return "<response/>"
+
+    async def set_values(self, values):
+        results = {}
+        for device_id, value in values.items():
+            try:
+                response = await self.set_value(device_id, value)
+            except aiohttp.ClientError as err:
+                results[device_id] = WriteResultDto(device_id, error=str(err))
+            else:
+                results[device_id] = WriteResultDto(device_id, response=response)
+        return results
+
+
+def stored_commands(store: FakeStore) -> dict[str, str]:
+    return {command["id"]: command["value"] for command in store.data["commands"]}
+
+
+@pytest.fixture(autouse=True)
+def no_drain_interval(monkeypatch):
+    monkeypatch.setattr(command_queue, "DRAIN_INTERVAL", 0)
+
+
+@pytest.fixture
+def api() -> FakeApi:
+    return FakeApi()
+
+
+@pytest.fixture
+def store() -> FakeStore:
+    return FakeStore()
+
+
+@pytest.fixture
+def queue(api, store) -> DivusCommandQueue:
+    queue = DivusCommandQueue(None, api, "entry", ttl=600)
+    queue._store = store
+    return queue
+
+
+class TestDivusCommandQueue:
+    """Test cases for DivusCommandQueue."""
+
+    async def test_successful_write_is_not_queued(self, queue, api):
+        """Writes the controller takes are sent right away."""
+        results = await queue.async_send({"1": "1"})
+        assert results["1"].success
+        assert not results["1"].queued
+        assert api.writes == [("1", "1")]
+        assert queue.pending == 0
+
+    async def test_failed_write_is_queued_and_saved(self, queue, api, store):
+        """A write the controller did not take is kept and stored."""
+        api.online = False
+        results = await queue.async_send({"1": "0"})
+        assert results["1"].queued
+        assert queue.pending == 1
+        assert stored_commands(store) == {"1": "0"}
+
+    async def test_commands_queue_behind_pending_ones(self, queue, api):
+        """While commands are queued, new ones wait behind them."""
+        api.online = False
+        await queue.async_send({"1": "0"})
+        api.online = True
+        results = await queue.async_send({"2": "1"})
+        assert results["2"].queued
+        assert api.writes == []
+
+    async def test_drain_replays_in_order(self, queue, api, store):
+        """Queued commands are replayed once the controller is back."""
+        api.online = False
+        await queue.async_send({"1": "0"})
+        await queue.async_send({"2": "1"})
+        api.online = True
+        await queue.async_drain()
+        assert api.writes == [("1", "0"), ("2", "1")]
+        assert queue.pending == 0
+        assert stored_commands(store) == {}
+
+    async def test_superseded_command_is_removed_from_storage(self, queue, api, store):
+        """A restart does not replay a command the user already overrode."""
+        api.online = False
+        await queue.async_send({"1": "0"})
+        api.online = True
+        # The newer command for the same object is written directly
+        results = await queue.async_send({"1": "1"})
+        assert results["1"].success
+        assert stored_commands(store) == {}
+
+        restarted = DivusCommandQueue(None, api, "entry", ttl=600)
+        restarted._store = store
+        await restarted.async_load()
+        await restarted.async_drain()
+        assert restarted.pending == 0
+        assert api.writes == [("1", "1")]
+
+    async def test_expired_commands_are_not_restored(self, queue, store):
+        """Commands older than the TTL are dropped on load."""
+        store.data = {
+            "commands": [{"id": "1", "value": "0", "expires": time.time() - 1}]
+        }
+        await queue.async_load()
+        assert queue.pending == 0
+
+    async def test_ttl_zero_disables_queueing(self, api, store):
+        """Without a TTL a failed write is reported as failed."""
+        queue = DivusCommandQueue(None, api, "entry", ttl=0)
+        queue._store = store
+        api.online = False
+        results = await queue.async_send({"1": "0"})
+        assert not results["1"].success
+        assert not results["1"].queued
+        assert queue.pending == 0
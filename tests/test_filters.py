@@ -0,0 +1,50 @@
+"""Tests for the temperature deadband filter."""
+
+from custom_components.divus_dplus.filters import DeadbandFilter
+
+
+class TestDeadbandFilter:
+    """Test cases for DeadbandFilter."""
+
+    def test_first_value_is_published(self, clock):
+        """The first value is always published."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        assert deadband_filter.accept(20.1)
+
+    def test_step_of_exactly_the_deadband_is_published(self, clock):
+        """A 0.1 step passes although 20.2 - 20.1 is 0.0999... as a float."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        deadband_filter.accept(20.1)
+        clock.now = 30
+        assert deadband_filter.is_due(20.2)
+        assert deadband_filter.accept(20.2)
+
+    def test_change_below_the_deadband_is_held_back(self, clock):
+        """Noise below the deadband is not published."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        deadband_filter.accept(20.1)
+        clock.now = 30
+        assert not deadband_filter.accept(20.15)
+
+    def test_min_interval_holds_back_large_changes(self, clock):
+        """Even a large change waits for the minimum interval."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        deadband_filter.accept(20.0)
+        clock.now = 10
+        assert not deadband_filter.accept(21.0)
+        clock.now = 30
+        assert deadband_filter.accept(21.0)
+
+    def test_max_age_publishes_small_drift(self, clock):
+        """After max_age the current value is published regardless."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        deadband_filter.accept(20.0)
+        clock.now = 600
+        assert deadband_filter.accept(20.05)
+
+    def test_reset_publishes_next_value(self, clock):
+        """After a reset the next value is published unconditionally."""
+        deadband_filter = DeadbandFilter(0.1, min_interval=30, max_age=600, clock=clock)
+        deadband_filter.accept(20.0)
+        deadband_filter.reset()
+        assert deadband_filter.accept(20.0)
@@ -0,0 +1,54 @@
+"""Tests for the adaptive request limit."""
+
+from custom_components.divus_dplus.governor import DivusLoadGovernor
+
+
+class TestDivusLoadGovernor:
+    """Test cases for DivusLoadGovernor."""
+
+    def test_starts_at_half_the_maximum(self, clock):
+        """The first requests run at half the configured concurrency."""
+        assert DivusLoadGovernor(max_limit=8, clock=clock).limit == 4
+
+    def test_fast_responses_raise_the_limit_up_to_the_maximum(self, clock):
+        """Each round of fast responses allows about one more request."""
+        governor = DivusLoadGovernor(max_limit=8, clock=clock)
+        for _ in range(5):
+            governor.record_latency(0.1)
+        assert governor.limit == 5
+        for _ in range(100):
+            governor.record_latency(0.1)
+        assert governor.limit == 8
+
+    def test_failure_halves_the_limit(self, clock):
+        """A failed request cuts the limit."""
+        governor = DivusLoadGovernor(max_limit=8, clock=clock)
+        governor.record_failure()
+        assert governor.limit == 2
+        assert governor.error_rate > 0
+
+    def test_cuts_wait_for_the_cooldown(self, clock):
+        """A burst of failures from one stall cuts the limit only once."""
+        governor = DivusLoadGovernor(max_limit=16, clock=clock)
+        governor.record_failure()
+        clock.now = 1
+        governor.record_failure()
+        assert governor.limit == 4
+        clock.now = 3
+        governor.record_failure()
+        assert governor.limit == 2
+
+    def test_slow_response_cuts_the_limit(self, clock):
+        """A response far slower than the fastest recent one counts as overload."""
+        governor = DivusLoadGovernor(max_limit=8, clock=clock)
+        governor.record_latency(0.1)
+        governor.record_latency(2.0)
+        assert governor.limit == 2
+
+    def test_limit_never_drops_below_the_minimum(self, clock):
+        """Repeated failures stop cutting at min_limit."""
+        governor = DivusLoadGovernor(max_limit=8, clock=clock)
+        for step in range(10):
+            clock.now = step * 10
+            governor.record_failure()
+        assert governor.limit == 1
@@ -0,0 +1,55 @@
+"""Tests for the cover travel-time model."""
+
+from custom_components.divus_dplus.motion import CoverTravelModel
+
+
+class TestCoverTravelModel:
+    """Test cases for CoverTravelModel."""
+
+    def test_position_follows_the_travel_time(self, clock):
+        """The estimate moves at constant speed in the travel direction."""
+        travel = CoverTravelModel(open_time=20, close_time=10, clock=clock)
+        travel.start(0, 1)
+        clock.now = 5
+        assert travel.position() == 25
+        assert travel.direction == 1
+
+    def test_closing_uses_the_close_time(self, clock):
+        """Closing runs at the speed given by close_time."""
+        travel = CoverTravelModel(open_time=20, close_time=10, clock=clock)
+        travel.start(100, -1)
+        clock.now = 5
+        assert travel.position() == 50
+
+    def test_travel_ends_at_the_target(self, clock):
+        """The estimate stops at the target and the model goes idle."""
+        travel = CoverTravelModel(open_time=20, close_time=10, clock=clock)
+        travel.start(0, 1, target=40)
+        clock.now = 60
+        assert travel.position() == 40
+        assert travel.direction == 0
+
+    def test_stop_keeps_the_estimated_position(self, clock):
+        """A stopped shutter stays where it was estimated to be."""
+        travel = CoverTravelModel(open_time=20, close_time=10, clock=clock)
+        travel.start(0, 1)
+        clock.now = 10
+        assert travel.stop() == 50
+        clock.now = 20
+        assert travel.position() == 50
+        assert travel.direction == 0
+
+    def test_sync_rebases_the_estimate(self, clock):
+        """A reported position replaces the estimate and travel continues from it."""
+        travel = CoverTravelModel(open_time=20, close_time=10, clock=clock)
+        travel.start(0, 1)
+        clock.now = 4
+        travel.sync(30)
+        clock.now = 6
+        assert travel.position() == 40
+
+    def test_zero_travel_time_jumps_to_the_target(self, clock):
+        """Without a travel time the shutter is assumed to arrive at once."""
+        travel = CoverTravelModel(open_time=0, close_time=0, clock=clock)
+        travel.start(100, -1)
+        assert travel.position() == 0
@@ -0,0 +1,121 @@
+"""Tests for the quarantine of object IDs that break the batch poll."""
+
+from custom_components.divus_dplus.dtos import DeviceStateDto
+from custom_components.divus_dplus.quarantine import (
+    DivusQuarantine,
+    async_find_rejected,
+)
+
+
+class FakeController:
+    """Refuses every query that contains one of the bad IDs."""
+
+    def __init__(self, bad=(), *, refuse_all=False) -> None:
+        self.bad = set(bad)
+        self.refuse_all = refuse_all
+        self.queries: list[list[str]] = []
+
+    async def query(self, device_ids):
+        self.queries.append(device_ids)
+        if self.refuse_all or self.bad.intersection(device_ids):
+            return []
+        return [DeviceStateDto(device_id, "0") for device_id in device_ids]
+
+
+def object_ids(count: int) -> list[str]:
+    return [str(index) for index in range(count)]
+
+
+class TestDivusQuarantine:
+    """Test cases for DivusQuarantine."""
+
+    def test_add_returns_only_new_objects(self, clock):
+        """Objects already quarantined are not reported again."""
+        quarantine = DivusQuarantine(clock=clock)
+        assert quarantine.add(["1", "2"]) == ["1", "2"]
+        assert quarantine.add(["2", "3"]) == ["3"]
+        assert "1" in quarantine
+        assert "4" not in quarantine
+
+    def test_probe_is_due_after_the_reprobe_interval(self, clock):
+        """Quarantined objects are probed only after reprobe_interval."""
+        quarantine = DivusQuarantine(reprobe_interval=300, clock=clock)
+        quarantine.add(["1"])
+        clock.now = 299
+        assert quarantine.due() == []
+        clock.now = 300
+        assert quarantine.due() == ["1"]
+
+    def test_failed_probes_double_the_interval_up_to_the_cap(self, clock):
+        """Each failed probe doubles the wait, capped at max_reprobe_interval."""
+        quarantine = DivusQuarantine(
+            reprobe_interval=300, max_reprobe_interval=1000, clock=clock
+        )
+        quarantine.add(["1"])
+        clock.now = 300
+        quarantine.record_failed_probe("1")
+        assert quarantine.as_dict()["1"]["next_probe_in"] == 600
+        quarantine.record_failed_probe("1")
+        assert quarantine.as_dict()["1"]["next_probe_in"] == 1000
+        assert quarantine.as_dict()["1"]["failed_probes"] == 2
+
+    def test_release_and_retain_remove_objects(self, clock):
+        """Answering objects and objects no longer polled leave the quarantine."""
+        quarantine = DivusQuarantine(clock=clock)
+        quarantine.add(["1", "2", "3"])
+        quarantine.release("1")
+        quarantine.retain(["1", "2"])
+        assert "1" not in quarantine
+        assert "2" in quarantine
+        assert "3" not in quarantine
+
+
+class TestAsyncFindRejected:
+    """Test cases for the bisection search for rejected objects."""
+
+    async def test_finds_the_objects_that_break_the_query(self):
+        """A few bad IDs among many are found without querying each object."""
+        controller = FakeController(bad=["5", "40", "41"])
+        bad = await async_find_rejected(
+            object_ids(64), controller.query, answered=True, keep_going=lambda: True
+        )
+        assert sorted(bad) == ["40", "41", "5"]
+        assert len(controller.queries) < 64
+
+    async def test_finds_bad_objects_in_one_half_of_a_refused_poll(self):
+        """When nothing answered yet, one answering half proves the IDs at fault."""
+        controller = FakeController(bad=["40", "41"])
+        bad = await async_find_rejected(
+            object_ids(64), controller.query, answered=False, keep_going=lambda: True
+        )
+        assert sorted(bad) == ["40", "41"]
+
+    async def test_objects_left_out_of_an_answer_are_rejected(self):
+        """IDs the controller silently skips are found in a single query."""
+        controller = FakeController()
+        controller.query = lambda ids: FakeController.query(controller, ids[:-1])
+        bad = await async_find_rejected(
+            object_ids(4), controller.query, answered=True, keep_going=lambda: True
+        )
+        assert bad == ["3"]
+
+    async def test_controller_refusing_everything_stops_after_the_first_split(self):
+        """A controller that refuses all queries costs three queries, not 2N - 1."""
+        controller = FakeController(refuse_all=True)
+        bad = await async_find_rejected(
+            object_ids(500), controller.query, answered=False, keep_going=lambda: True
+        )
+        assert bad is None
+        assert [len(ids) for ids in controller.queries] == [500, 250, 250]
+
+    async def test_search_gives_up_when_told_to(self):
+        """The search stops between queries once keep_going turns False."""
+        controller = FakeController(bad=["1"])
+        bad = await async_find_rejected(
+            object_ids(8),
+            controller.query,
+            answered=False,
+            keep_going=lambda: len(controller.queries) < 2,
+        )
+        assert bad is None
+        assert len(controller.queries) == 2
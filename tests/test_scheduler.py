@@ -0,0 +1,110 @@
+"""Tests for the priority request scheduler."""
+
+import asyncio
+
+import pytest
+
+from custom_components.divus_dplus.scheduler import (
+    DivusPollSkippedError,
+    DivusRequestScheduler,
+    RequestPriority,
+)
+
+
+async def hold(
+    scheduler: DivusRequestScheduler,
+    priority: RequestPriority,
+    started: list[RequestPriority],
+    release: asyncio.Event,
+) -> None:
+    """Hold a slot of the given priority until release is set."""
+    async with scheduler.slot(priority):
+        started.append(priority)
+        await release.wait()
+
+
+async def settle() -> None:
+    """Let the tasks created so far run up to their next wait."""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestDivusRequestScheduler:
+    """Test cases for DivusRequestScheduler."""
+
+    async def test_write_runs_beside_a_poll_at_limit_one(self):
+        """The reserved write lane stays open while a poll holds the only slot."""
+        scheduler = DivusRequestScheduler(max_in_flight=1)
+        started: list[RequestPriority] = []
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(hold(scheduler, RequestPriority.POLL, started, release))
+        ]
+        await settle()
+        tasks.append(
+            asyncio.create_task(
+                hold(scheduler, RequestPriority.WRITE, started, release)
+            )
+        )
+        await settle()
+        assert started == [RequestPriority.POLL, RequestPriority.WRITE]
+        release.set()
+        await asyncio.gather(*tasks)
+
+    async def test_other_requests_do_not_use_the_write_lane(self):
+        """A refresh waits for the slot instead of taking the reserved one."""
+        scheduler = DivusRequestScheduler(max_in_flight=1)
+        started: list[RequestPriority] = []
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(
+                hold(scheduler, RequestPriority.DISCOVERY, started, release)
+            )
+        ]
+        await settle()
+        tasks.append(
+            asyncio.create_task(
+                hold(scheduler, RequestPriority.REFRESH, started, release)
+            )
+        )
+        await settle()
+        assert started == [RequestPriority.DISCOVERY]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert started == [RequestPriority.DISCOVERY, RequestPriority.REFRESH]
+
+    async def test_poll_is_skipped_while_a_write_is_in_flight(self):
+        """A routine poll yields to a user command."""
+        scheduler = DivusRequestScheduler(max_in_flight=1)
+        release = asyncio.Event()
+        write = asyncio.create_task(hold(scheduler, RequestPriority.WRITE, [], release))
+        await settle()
+        with pytest.raises(DivusPollSkippedError):
+            async with scheduler.slot(RequestPriority.POLL):
+                pass
+        release.set()
+        await write
+        assert scheduler.writes_in_flight == 0
+
+    async def test_queued_requests_start_by_priority(self):
+        """Once a slot frees up, the most urgent queued request gets it."""
+        scheduler = DivusRequestScheduler(max_in_flight=1, reserved_write_slots=0)
+        started: list[RequestPriority] = []
+        first = asyncio.Event()
+        rest = asyncio.Event()
+        blocker = asyncio.create_task(
+            hold(scheduler, RequestPriority.DISCOVERY, [], first)
+        )
+        await settle()
+        tasks = [
+            asyncio.create_task(hold(scheduler, priority, started, rest))
+            for priority in (RequestPriority.DISCOVERY, RequestPriority.REFRESH)
+        ]
+        await settle()
+        first.set()
+        await blocker
+        await settle()
+        assert started == [RequestPriority.REFRESH]
+        rest.set()
+        await asyncio.gather(*tasks)
+        assert started == [RequestPriority.REFRESH, RequestPriority.DISCOVERY]
@@ -0,0 +1,53 @@
+"""Tests for parsing the controller's answer to a state query."""
+
+from custom_components.divus_dplus.api import DivusDplusApi
+
+
+class FakeTransport:
+    """Answers every state query with the given payload rows."""
+
+    def __init__(self, *rows: str) -> None:
+        self.payload = "\n".join(rows)
+
+    async def post(self, url, data, content_type):
+        if url.endswith("user_login.php"):
+            return "<response><sessionid>session</sessionid></response>"
+        return f"<response><payload>{self.payload}</payload></response>"
+
+    async def close(self) -> None:
+        pass
+
+
+async def get_states(*rows: str) -> dict[str, bool]:
+    """Return the availability of each object in the answer."""
+    api = DivusDplusApi("host", "user", "secret", transport=FakeTransport(*rows))
+    states = await api.get_states(["1", "2", "3"])
+    return {state.id: state.available for state in states}
+
+
+class TestStatusColumn:
+    """Test cases for the per-object STATUS flag."""
+
+    async def test_error_values_mark_objects_unavailable(self):
+        """Objects flagged with a known error value are unavailable."""
+        available = await get_states(
+            "Row0: ID, CURRENT_VALUE, STATUS",
+            "Row1: '1','5',''",
+            "Row2: '2','5','ERROR'",
+            "Row3: '3','5','fault'",
+        )
+        assert available == {"1": True, "2": False, "3": False}
+
+    async def test_unknown_status_values_keep_objects_available(self):
+        """Firmware using STATUS for other flags does not take objects down."""
+        available = await get_states(
+            "Row0: ID, CURRENT_VALUE, STATUS",
+            "Row1: '1','5','1'",
+            "Row2: '2','5','ACTIVE'",
+        )
+        assert available == {"1": True, "2": True}
+
+    async def test_answer_without_status_column(self):
+        """Without the column every returned object is available."""
+        available = await get_states("Row0: ID, CURRENT_VALUE", "Row1: '1','ERROR'")
+        assert available == {"1": True}
@@ -0,0 +1,47 @@
+"""Tests for the shared state store."""
+
+from custom_components.divus_dplus.dtos import DeviceStateDto
+from custom_components.divus_dplus.state_store import DivusStateStore
+
+
+class TestDivusStateStore:
+    """Test cases for DivusStateStore."""
+
+    def test_only_changes_are_stored(self):
+        """A repeated value is neither stored again nor reported as changed."""
+        store = DivusStateStore()
+        first = DeviceStateDto("1", "5")
+        assert store.update([first]) == [(None, first)]
+        assert store.update([DeviceStateDto("1", "5")]) == []
+        assert store.get("1") is first
+
+    def test_availability_change_is_a_change(self):
+        """Losing availability with the same value is reported."""
+        store = DivusStateStore()
+        store.update([DeviceStateDto("1", "5")])
+        changes = store.update([DeviceStateDto("1", "5", available=False)])
+        assert [new.available for _, new in changes] == [False]
+
+    def test_changed_since_a_version(self):
+        """Entities get the objects that changed after the version they saw."""
+        store = DivusStateStore()
+        store.update([DeviceStateDto("1", "5"), DeviceStateDto("2", "5")])
+        seen = store.version
+        store.update([DeviceStateDto("2", "6"), DeviceStateDto("3", "1")])
+        changed = store.changed_since(["1", "2"], seen)
+        assert [state.id for state in changed] == ["2"]
+
+    def test_mark_missing_keeps_the_last_value(self):
+        """Missing objects turn unavailable; those never seen have no value."""
+        store = DivusStateStore()
+        store.update([DeviceStateDto("1", "5")])
+        missing = {state.id: state for state in store.mark_missing(["1", "2"])}
+        assert missing["1"].current_value == "5"
+        assert not missing["1"].available
+        assert missing["2"].current_value is None
+
+    def test_mark_missing_skips_objects_already_unavailable(self):
+        """An object reported missing twice changes only once."""
+        store = DivusStateStore()
+        store.update(store.mark_missing(["1"]))
+        assert store.mark_missing(["1"]) == []
@@ -0,0 +1,83 @@
+"""Tests for traffic recording and replay."""
+
+import pytest
+
+from custom_components.divus_dplus.transport import (
+    FORM_CONTENT_TYPE,
+    REDACTED,
+    DivusReplayMissError,
+    RecordingTransport,
+    ReplayTransport,
+    redact,
+)
+
+
+class FakeTransport:
+    """Answers each request with a fixed body per endpoint."""
+
+    def __init__(self) -> None:
+        self.answers = {
+            "user_login.php": "<response><sessionid>s3cret</sessionid></response>",
+            "api.php": "<response><payload>Row0: ID</payload></response>",
+        }
+
+    async def post(self, url, data, content_type):
+        return self.answers[url.rsplit("/", 1)[-1]]
+
+    async def close(self) -> None:
+        pass
+
+
+class TestRedact:
+    """Test cases for redact."""
+
+    def test_form_credentials_and_session_are_redacted(self):
+        """Usernames, passwords and session IDs never reach a capture."""
+        data = "username=admin&password=pw&sessionId=abc&ids=187"
+        assert redact(data, FORM_CONTENT_TYPE) == (
+            f"username={REDACTED}&password={REDACTED}&sessionId={REDACTED}&ids=187"
+        )
+
+    def test_xml_session_is_redacted(self):
+        """Session IDs in SOAP bodies and login answers are redacted."""
+        assert redact("<sessionid>abc</sessionid>", "text/xml") == (
+            f"<sessionid>{REDACTED}</sessionid>"
+        )
+
+
+class TestRecordAndReplay:
+    """Test cases for RecordingTransport and ReplayTransport."""
+
+    async def test_replay_answers_what_was_recorded(self, tmp_path):
+        """A recorded session replays without the controller or its secrets."""
+        path = tmp_path / "capture.jsonl"
+        recorder = RecordingTransport(FakeTransport(), path)
+        await recorder.post(
+            "http://box/www/modules/system/user_login.php",
+            "username=admin&password=pw",
+            FORM_CONTENT_TYPE,
+        )
+        await recorder.post(
+            "http://box/www/modules/system/api.php",
+            "filter=ID+IN+%281%29&sessionid=s3cret",
+            FORM_CONTENT_TYPE,
+        )
+        assert "s3cret" not in path.read_text(encoding="utf-8")
+        assert "pw" not in path.read_text(encoding="utf-8")
+
+        replay = ReplayTransport(path, speed=0)
+        response = await replay.post(
+            "http://other/www/modules/system/api.php",
+            "filter=ID+IN+%281%29&sessionid=other",
+            FORM_CONTENT_TYPE,
+        )
+        assert response == "<response><payload>Row0: ID</payload></response>"
+
+    async def test_replay_misses_unknown_endpoints(self, tmp_path):
+        """A request the capture has nothing for raises DivusReplayMissError."""
+        path = tmp_path / "capture.jsonl"
+        path.write_text("", encoding="utf-8")
+        with pytest.raises(DivusReplayMissError):
+            await ReplayTransport(path, speed=0).post(
+                "http://box/cgi-bin/dpadws", "<sessionid>x</sessionid>", "text/xml"
+            )